@@ -0,0 +1,3 @@
+"""
+Offline benchmark harness: fake CTFd server, fake Discord and scenarios.
+"""
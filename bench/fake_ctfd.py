@@ -0,0 +1,413 @@
+"""
+Offline fake CTFd server generating synthetic challenges, teams and solves.
+
+Run it standalone to point a bot at it:
+
+    python -m bench.fake_ctfd --challenges 1000 --submissions 50000 --port 8000
+"""
+
+import argparse
+import asyncio
+import hashlib
+import logging
+import random
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+CATEGORIES = ["web", "pwn", "crypto", "rev", "forensics", "misc"]
+
+# Largest page CTFd serves, whatever per_page asks for
+MAX_PER_PAGE = 100
+
+
+def iso(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+class FakeCTFd:
+    """
+    In-memory CTFd event exposing the API endpoints the bot uses.
+
+    Challenges beyond ``solved_fraction`` start unsolved so first bloods can
+    be produced on demand with add_solve(). Responses carry ETags and honour
+    If-None-Match, and every request and body byte sent is counted in
+    ``stats``.
+
+    Args:
+        challenges (int): Number of challenges
+        teams (int): Number of teams
+        users_per_team (int): Members per team
+        submissions (int): Submissions generated up front
+        incorrect_ratio (float): Share of generated submissions that are wrong
+        solved_fraction (float): Share of challenges that may start solved
+        solve_rate (float): Correct solves per second added by the stream
+        latency (float): Seconds every response is delayed, to mimic the
+            round trip to a remote CTFd
+        seed (int): Random seed, so runs are comparable
+    """
+
+    def __init__(
+        self,
+        challenges=1000,
+        teams=500,
+        users_per_team=3,
+        submissions=50000,
+        incorrect_ratio=0.5,
+        solved_fraction=0.9,
+        solve_rate=0.0,
+        latency=0.0,
+        seed=1,
+    ):
+        self.rng = random.Random(seed)
+        self.solve_rate = solve_rate
+        self.latency = latency
+        self.incorrect_ratio = incorrect_ratio
+        self.start_time = time.time() - 3600
+        self.challenges = {
+            i: {
+                "id": i,
+                "type": "standard",
+                "name": f"challenge-{i}",
+                "category": CATEGORIES[i % len(CATEGORIES)],
+                "value": 100 + 50 * (i % 10),
+            }
+            for i in range(1, challenges + 1)
+        }
+        self.teams = {i: {"id": i, "name": f"team-{i}"} for i in range(1, teams + 1)}
+        self.team_ids = list(self.teams)
+        self.challenge_ids = list(self.challenges)
+        self.users_per_team = users_per_team
+        self.users = {}
+        for team_id in self.teams:
+            for n in range(users_per_team):
+                user_id = len(self.users) + 1
+                self.users[user_id] = {
+                    "id": user_id,
+                    "name": f"user-{user_id}",
+                    "team_id": team_id,
+                }
+        self.submissions = []  # all submissions in id order
+        self.correct = []  # correct submissions in id order
+        self.solves = {i: [] for i in self.challenges}  # challenge id -> solves
+        self.solved = set()  # (team id, challenge id)
+        self.scores = Counter()  # team id -> score
+        self.stats = {"requests": 0, "bytes": 0, "not_modified": 0}
+        self.requests_by_path = Counter()
+        self._runner = None
+        self._stream = None
+        self._generate(submissions, solved_fraction)
+
+    def _generate(self, count, solved_fraction):
+        count_solvable = max(int(len(self.challenge_ids) * solved_fraction), 1)
+        solvable = self.challenge_ids[:count_solvable]
+        correct = min(
+            int(count * (1 - self.incorrect_ratio)), len(self.teams) * len(solvable)
+        )
+        timestamps = sorted(
+            self.start_time + self.rng.random() * 3000 for _ in range(count)
+        )
+        correct_slots = set(self.rng.sample(range(count), correct))
+        for n, timestamp in enumerate(timestamps):
+            if n in correct_slots:
+                while True:
+                    team_id = self.rng.choice(self.team_ids)
+                    challenge_id = self.rng.choice(solvable)
+                    if (team_id, challenge_id) not in self.solved:
+                        break
+                self._record(team_id, challenge_id, "correct", timestamp)
+            else:
+                self._record(
+                    self.rng.choice(self.team_ids),
+                    self.rng.choice(self.challenge_ids),
+                    "incorrect",
+                    timestamp,
+                )
+
+    def _record(self, team_id, challenge_id, submission_type, timestamp):
+        challenge = self.challenges[challenge_id]
+        team = self.teams[team_id]
+        user = self.users[(team_id - 1) * self.users_per_team + 1]
+        submission = {
+            "id": len(self.submissions) + 1,
+            "challenge_id": challenge_id,
+            "challenge": {
+                "id": challenge_id,
+                "name": challenge["name"],
+                "category": challenge["category"],
+                "value": challenge["value"],
+            },
+            "user_id": user["id"],
+            "user": {"id": user["id"], "name": user["name"]},
+            "team_id": team_id,
+            "team": {"id": team_id, "name": team["name"]},
+            "type": submission_type,
+            "provided": "flag{...}",
+            "date": iso(timestamp),
+        }
+        self.submissions.append(submission)
+        if submission_type == "correct":
+            self.correct.append(submission)
+            self.solved.add((team_id, challenge_id))
+            self.solves[challenge_id].append(submission)
+            self.scores[team_id] += challenge["value"]
+        return submission
+
+    def unsolved_challenges(self):
+        return [i for i, solves in self.solves.items() if not solves]
+
+    def add_solve(self, challenge_id=None, team_id=None):
+        """Record a correct submission now, by default on a random new pair"""
+        for _ in range(1000):
+            chal = challenge_id or self.rng.choice(self.challenge_ids)
+            team = team_id or self.rng.choice(self.team_ids)
+            if (team, chal) not in self.solved:
+                return self._record(team, chal, "correct", time.time())
+        return None
+
+    async def _run_stream(self):
+        while True:
+            await asyncio.sleep(1 / self.solve_rate)
+            self.add_solve()
+            if self.rng.random() < self.incorrect_ratio:
+                self._record(
+                    self.rng.choice(self.team_ids),
+                    self.rng.choice(self.challenge_ids),
+                    "incorrect",
+                    time.time(),
+                )
+
+    # Responses
+
+    @staticmethod
+    def _ok(data, pagination=None):
+        body = {"success": True, "data": data}
+        if pagination is not None:
+            body["meta"] = {"pagination": pagination}
+        return web.json_response(body)
+
+    @staticmethod
+    def _paginate(request, items):
+        try:
+            page = max(int(request.query.get("page", 1)), 1)
+            per_page = min(max(int(request.query.get("per_page", 20)), 1), MAX_PER_PAGE)
+        except ValueError:
+            raise web.HTTPBadRequest()
+        total = len(items)
+        pages = max((total + per_page - 1) // per_page, 1)
+        if page > pages:
+            raise web.HTTPNotFound()  # like CTFd's paginate(error_out=True)
+        start = (page - 1) * per_page
+        return items[start : start + per_page], {
+            "page": page,
+            "next": page + 1 if page < pages else None,
+            "prev": page - 1 if page > 1 else None,
+            "pages": pages,
+            "per_page": per_page,
+            "total": total,
+        }
+
+    def _challenge(self, request):
+        challenge = self.challenges.get(int(request.match_info["challenge_id"]))
+        if challenge is None:
+            raise web.HTTPNotFound()
+        return challenge
+
+    async def challenges_list(self, request):
+        # Like CTFd, the challenge listing is not paginated
+        return self._ok(
+            [{**c, "solves": len(self.solves[c["id"]])} for c in self.challenges.values()]
+        )
+
+    async def challenge_detail(self, request):
+        challenge = self._challenge(request)
+        return self._ok(
+            {
+                **challenge,
+                "solves": len(self.solves[challenge["id"]]),
+                "description": "Synthetic challenge",
+            }
+        )
+
+    async def challenge_solves(self, request):
+        challenge = self._challenge(request)
+        return self._ok(
+            [
+                {
+                    "account_id": s["team_id"],
+                    "name": s["team"]["name"],
+                    "date": s["date"],
+                    "account_url": f"/teams/{s['team_id']}",
+                }
+                for s in self.solves[challenge["id"]]
+            ]
+        )
+
+    async def scoreboard(self, request):
+        ranked = sorted(self.teams, key=lambda t: (-self.scores[t], t))
+        return self._ok(
+            [
+                {
+                    "pos": pos,
+                    "account_id": team_id,
+                    "account_url": f"/teams/{team_id}",
+                    "account_type": "team",
+                    "name": self.teams[team_id]["name"],
+                    "score": self.scores[team_id],
+                }
+                for pos, team_id in enumerate(ranked, start=1)
+            ]
+        )
+
+    async def teams_list(self, request):
+        items, pagination = self._paginate(request, list(self.teams.values()))
+        return self._ok(items, pagination)
+
+    async def users_list(self, request):
+        items, pagination = self._paginate(request, list(self.users.values()))
+        return self._ok(items, pagination)
+
+    async def submissions_list(self, request):
+        submission_type = request.query.get("type")
+        if submission_type == "correct":
+            submissions = self.correct
+        elif submission_type:
+            submissions = [s for s in self.submissions if s["type"] == submission_type]
+        else:
+            submissions = self.submissions
+        items, pagination = self._paginate(request, submissions)
+        return self._ok(items, pagination)
+
+    async def configs(self, request):
+        return self._ok(
+            [
+                {"key": "ctf_name", "value": "Benchmark CTF"},
+                {"key": "start", "value": str(int(self.start_time))},
+                {"key": "end", "value": str(int(self.start_time + 48 * 3600))},
+            ]
+        )
+
+    async def challenge_solve_statistics(self, request):
+        return self._ok(
+            [
+                {"id": c["id"], "name": c["name"], "solves": len(self.solves[c["id"]])}
+                for c in self.challenges.values()
+            ]
+        )
+
+    async def team_statistics(self, request):
+        return self._ok({"registered": len(self.teams)})
+
+    async def user_statistics(self, request):
+        return self._ok({"registered": len(self.users), "confirmed": len(self.users)})
+
+    @web.middleware
+    async def _middleware(self, request, handler):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if not request.headers.get("Authorization", "").startswith("Token "):
+            response = web.json_response({"success": False}, status=403)
+        else:
+            response = await handler(request)
+        if response.status == 200 and response.body:
+            etag = f'"{hashlib.blake2b(response.body, digest_size=8).hexdigest()}"'
+            if request.headers.get("If-None-Match") == etag:
+                response = web.Response(status=304, headers={"ETag": etag})
+                self.stats["not_modified"] += 1
+            else:
+                response.headers["ETag"] = etag
+        self.stats["requests"] += 1
+        self.stats["bytes"] += len(response.body or b"")
+        resource = request.match_info.route.resource
+        self.requests_by_path[resource.canonical if resource else request.path] += 1
+        return response
+
+    def app(self):
+        app = web.Application(middlewares=[self._middleware])
+        routes = [
+            ("/api/v1/challenges", self.challenges_list),
+            ("/api/v1/challenges/{challenge_id}", self.challenge_detail),
+            ("/api/v1/challenges/{challenge_id}/solves", self.challenge_solves),
+            ("/api/v1/scoreboard", self.scoreboard),
+            ("/api/v1/teams", self.teams_list),
+            ("/api/v1/users", self.users_list),
+            ("/api/v1/submissions", self.submissions_list),
+            ("/api/v1/configs", self.configs),
+            ("/api/v1/statistics/challenges/solves", self.challenge_solve_statistics),
+            ("/api/v1/statistics/teams", self.team_statistics),
+            ("/api/v1/statistics/users", self.user_statistics),
+        ]
+        for path, handler in routes:
+            app.router.add_get(path, handler)
+        return app
+
+    async def start(self, host="127.0.0.1", port=8000):
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        if self.solve_rate > 0:
+            self._stream = asyncio.create_task(self._run_stream())
+        logger.info(
+            f"Fake CTFd on http://{host}:{port} with {len(self.challenges)} challenges, "
+            f"{len(self.teams)} teams and {len(self.submissions)} submissions"
+        )
+
+    async def stop(self):
+        if self._stream is not None:
+            self._stream.cancel()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+
+def add_arguments(parser):
+    parser.add_argument("--challenges", type=int, default=1000)
+    parser.add_argument("--teams", type=int, default=500)
+    parser.add_argument("--users-per-team", type=int, default=3)
+    parser.add_argument("--submissions", type=int, default=50000)
+    parser.add_argument("--incorrect-ratio", type=float, default=0.5)
+    parser.add_argument("--solved-fraction", type=float, default=0.9)
+    parser.add_argument(
+        "--solve-rate", type=float, default=0.0, help="correct solves per second"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="simulated round trip in seconds"
+    )
+    parser.add_argument("--seed", type=int, default=1)
+
+
+def from_arguments(args):
+    return FakeCTFd(
+        challenges=args.challenges,
+        teams=args.teams,
+        users_per_team=args.users_per_team,
+        submissions=args.submissions,
+        incorrect_ratio=args.incorrect_ratio,
+        solved_fraction=args.solved_fraction,
+        solve_rate=args.solve_rate,
+        latency=args.latency,
+        seed=args.seed,
+    )
+
+
+async def serve(args):
+    fake = from_arguments(args)
+    await fake.start(args.host, args.port)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await fake.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_arguments(parser)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
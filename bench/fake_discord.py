@@ -0,0 +1,74 @@
+"""
+Fake Discord client and channels recording what the bot announces.
+"""
+
+import asyncio
+import time
+
+
+class FakeChannel:
+    """
+    Text channel that records every message with its arrival time.
+
+    Args:
+        channel_id (int): Channel id
+        send_delay (float): Seconds each send takes, to mimic Discord latency
+    """
+
+    def __init__(self, channel_id, send_delay=0.0):
+        self.id = channel_id
+        self.send_delay = send_delay
+        self.messages = []  # (time.time(), content)
+        self._received = asyncio.Condition()
+
+    async def send(self, content=None, **kwargs):
+        if self.send_delay:
+            await asyncio.sleep(self.send_delay)
+        async with self._received:
+            self.messages.append((time.time(), content))
+            self._received.notify_all()
+
+    async def wait_for(self, text, timeout=10):
+        """Return the arrival time of the first message containing text"""
+
+        def find():
+            for received_at, content in self.messages:
+                if text in content:
+                    return received_at
+            return None
+
+        async with self._received:
+            await asyncio.wait_for(
+                self._received.wait_for(lambda: find() is not None), timeout
+            )
+            return find()
+
+
+class FakeBot:
+    """
+    Stand-in for AnnouncerBot exposing what register_tasks relies on.
+
+    Args:
+        instances (InstanceRegistry): CTFd instances to serve
+        send_delay (float): Simulated latency of every channel send
+    """
+
+    def __init__(self, instances, send_delay=0.0):
+        self.instances = instances
+        self.send_delay = send_delay
+        self.guilds = []
+        self.channels = {}
+
+    def get_channel(self, channel_id):
+        channel = self.channels.get(channel_id)
+        if channel is None:
+            channel = self.channels[channel_id] = FakeChannel(
+                channel_id, self.send_delay
+            )
+        return channel
+
+    async def fetch_channel(self, channel_id):
+        return self.get_channel(channel_id)
+
+    def message_count(self):
+        return sum(len(channel.messages) for channel in self.channels.values())
@@ -0,0 +1,304 @@
+"""
+End-to-end benchmark of first blood polling and the slash command data path.
+
+Starts a fake CTFd server, wires the real bot tasks to a fake Discord
+client and reports poll duration, requests per poll, bytes transferred,
+announcement latency and event-loop block time:
+
+    python -m bench.run --challenges 1000 --submissions 50000
+    python -m bench.run --source submissions --json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import time
+from .fake_ctfd import add_arguments, from_arguments
+from .fake_discord import FakeBot
+
+logger = logging.getLogger("bench")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def configure_environment(args, port, db_path):
+    """Point the bot configuration at the fake server; must run before import"""
+    os.environ.update(
+        DISCORD_TOKEN="bench",
+        CTFD_URL=f"http://127.0.0.1:{port}",
+        CTFD_API_KEY="bench-token",
+        ANNOUNCE_CHANNEL_ID="1",
+        DB_PATH=db_path,
+        FIRST_BLOOD_SOURCE=args.source,
+        CTFD_INSTANCES="",
+        HTTP_PORT="0",
+        LOG_LEVEL=args.log_level.upper(),
+    )
+
+
+class LoopLagMonitor:
+    """
+    Measures how long the event loop is blocked.
+
+    A task sleeps for ``interval`` in a loop; any extra delay before it
+    wakes up is time the loop spent running something else without
+    yielding.
+    """
+
+    def __init__(self, interval=0.005, threshold=0.010):
+        self.interval = interval
+        self.threshold = threshold
+        self.max_lag = 0.0
+        self.blocked = 0.0
+        self._task = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = time.perf_counter() - start - self.interval
+            self.max_lag = max(self.max_lag, lag)
+            if lag > self.threshold:
+                self.blocked += lag
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    def reset(self):
+        self.max_lag = 0.0
+        self.blocked = 0.0
+
+    async def stop(self):
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+
+class Benchmark:
+    """Runs the scenarios against one fake CTFd and collects the results"""
+
+    def __init__(self, fake, bot, instance, monitor):
+        self.fake = fake
+        self.bot = bot
+        self.instance = instance
+        self.monitor = monitor
+        self.results = []
+
+    async def measure(self, coro_fn, fresh=True):
+        """Run coro_fn and return (seconds, requests, bytes, block seconds)"""
+        if fresh:
+            # Polls are seconds apart in production, so start from an expired
+            # response cache; conditional-GET validators are kept
+            self.instance.ctfd.cache.invalidate()
+        requests, sent = self.fake.stats["requests"], self.fake.stats["bytes"]
+        self.monitor.reset()
+        start = time.perf_counter()
+        await coro_fn()
+        elapsed = time.perf_counter() - start
+        return (
+            elapsed,
+            self.fake.stats["requests"] - requests,
+            self.fake.stats["bytes"] - sent,
+            self.monitor.blocked,
+        )
+
+    def record(self, name, runs, latencies=None, extra=None):
+        durations = [run[0] for run in runs]
+        result = {
+            "scenario": name,
+            "runs": len(runs),
+            "duration_ms": round(statistics.median(durations) * 1000, 2),
+            "duration_max_ms": round(max(durations) * 1000, 2),
+            "requests": round(statistics.median(run[1] for run in runs), 1),
+            "kbytes": round(statistics.median(run[2] for run in runs) / 1024, 1),
+            "loop_blocked_ms": round(max(run[3] for run in runs) * 1000, 2),
+        }
+        if latencies:
+            result["latency_ms"] = round(statistics.median(latencies) * 1000, 2)
+            result["latency_max_ms"] = round(max(latencies) * 1000, 2)
+        result.update(extra or {})
+        self.results.append(result)
+        return result
+
+    async def wait_delivered(self, timeout=60):
+        deadline = time.perf_counter() + timeout
+        while self.instance.queue.has_pending():
+            if time.perf_counter() > deadline:
+                raise TimeoutError("announcements still pending")
+            await asyncio.sleep(0.01)
+
+    async def cold_poll(self, max_polls=50):
+        """Polls against a fresh database until every first blood is delivered
+
+        First bloods that do not fit in the announcement queue are picked up
+        again by the following polls, so this also reports how many polls
+        catching up takes.
+        """
+        before = self.bot.message_count()
+        start = time.perf_counter()
+        runs = []
+        for _ in range(max_polls):
+            delivered = self.bot.message_count()
+            runs.append(await self.measure(self.instance.poll_first_bloods))
+            await self.wait_delivered()
+            if len(runs) > 1 and self.bot.message_count() == delivered:
+                break
+        self.record(
+            "cold poll",
+            runs[:1],
+            extra={
+                "catch_up_polls": len(runs),
+                "catch_up_ms": round((time.perf_counter() - start) * 1000, 2),
+                "messages": self.bot.message_count() - before,
+            },
+        )
+
+    async def steady_poll(self, rounds):
+        """Polls with nothing new to announce"""
+        runs = [
+            await self.measure(self.instance.poll_first_bloods) for _ in range(rounds)
+        ]
+        self.record("steady poll", runs)
+
+    async def first_blood_latency(self, rounds):
+        """Time from a solve landing in CTFd to the announcement reaching Discord
+
+        The poll starts right after the solve, so this excludes the time
+        spent waiting for the next scheduled poll.
+        """
+        unsolved = self.fake.unsolved_challenges()
+        if not unsolved:
+            logger.warning("No unsolved challenges left; skipping latency scenario")
+            return
+        runs, latencies = [], []
+        channel = self.bot.get_channel(self.instance.channel_id)
+        for challenge_id in unsolved[:rounds]:
+            submission = self.fake.add_solve(challenge_id)
+            solved_at = time.time()
+            runs.append(await self.measure(self.instance.poll_first_bloods))
+            received_at = await channel.wait_for(
+                f"**{submission['challenge']['name']}**"
+            )
+            latencies.append(received_at - solved_at)
+            await self.wait_delivered()
+        self.record("first blood", runs, latencies)
+
+    async def snapshot_refresh(self, rounds):
+        """Background refresh feeding /top10 and /stats"""
+        runs = [
+            await self.measure(self.instance.refresh_snapshot) for _ in range(rounds)
+        ]
+        self.record("snapshot refresh", runs)
+
+    async def command_render(self, rounds):
+        """/top10 and /stats once a snapshot exists: no CTFd request at all"""
+
+        async def render():
+            snapshot = self.instance.snapshot or await self.instance.refresh_snapshot()
+            "\n".join(
+                f"{i + 1}. {name} ({score})"
+                for i, (name, score) in enumerate(snapshot.top(10))
+            )
+
+        runs = [await self.measure(render, fresh=False) for _ in range(rounds)]
+        self.record("command render", runs)
+
+
+async def run(args):
+    fake = from_arguments(args)
+    port = free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_environment(args, port, os.path.join(tmp, "state.db"))
+        # Imported late so the configuration above is what the bot reads
+        from onectfdannouncer.instances import load_instances
+        from onectfdannouncer.tasks import register_tasks
+
+        await fake.start("127.0.0.1", port)
+        instances = load_instances()
+        bot = FakeBot(instances, send_delay=args.send_delay)
+        register_tasks(bot)
+        instance = instances.default
+        monitor = LoopLagMonitor()
+        monitor.start()
+        bench = Benchmark(fake, bot, instance, monitor)
+        try:
+            await bench.cold_poll()
+            await bench.steady_poll(args.rounds)
+            await bench.first_blood_latency(args.rounds)
+            await bench.snapshot_refresh(args.rounds)
+            await bench.command_render(args.rounds)
+        finally:
+            await monitor.stop()
+            for inst in instances:
+                await inst.close()
+            await fake.stop()
+    return bench.results, fake
+
+
+def print_table(results):
+    columns = [
+        "scenario",
+        "runs",
+        "duration_ms",
+        "duration_max_ms",
+        "requests",
+        "kbytes",
+        "latency_ms",
+        "loop_blocked_ms",
+    ]
+    widths = {
+        column: max(len(column), *(len(str(r.get(column, "-"))) for r in results))
+        for column in columns
+    }
+    print("  ".join(column.ljust(widths[column]) for column in columns))
+    for result in results:
+        print(
+            "  ".join(
+                str(result.get(column, "-")).ljust(widths[column]) for column in columns
+            )
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_arguments(parser)
+    parser.add_argument(
+        "--source", choices=["solves", "submissions"], default="solves",
+        help="FIRST_BLOOD_SOURCE of the bot",
+    )
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument(
+        "--send-delay", type=float, default=0.05,
+        help="simulated Discord send latency in seconds",
+    )
+    parser.add_argument("--json", action="store_true", help="print JSON results")
+    parser.add_argument("--log-level", default="ERROR", help="log level of the bot")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=args.log_level.upper(), stream=sys.stderr)
+
+    results, fake = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps({"parameters": vars(args), "results": results}, indent=2))
+    else:
+        print(
+            f"{args.challenges} challenges, {args.teams} teams, "
+            f"{args.submissions} submissions, source={args.source}"
+        )
+        print_table(results)
+        for result in results:
+            extra = {k: v for k, v in result.items() if k in ("catch_up_polls", "catch_up_ms", "messages")}
+            if extra:
+                print(f"{result['scenario']}: {extra}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,3 @@
-from .state_db import StateDB
+from .state_db import StateDB, AsyncStateDB
 from .ctfd_api import CTFdAPI
 from .config import *
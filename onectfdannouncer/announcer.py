@@ -0,0 +1,286 @@
+"""
+Outbound Discord announcement queue with batching and retries.
+"""
+
+import asyncio
+import logging
+import discord
+from .metrics import DISCORD_SEND_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Discord's limit for the content of a single message
+MAX_MESSAGE_LENGTH = 2000
+
+
+# Matches any event type or category in a route
+ANY = "*"
+
+
+class ChannelUnreachableError(Exception):
+    """Raised when Discord reports a channel deleted or inaccessible"""
+
+    def __init__(self, channel_id):
+        super().__init__(f"Channel {channel_id} is unreachable")
+        self.channel_id = channel_id
+
+
+class Announcement:
+    """A message waiting to be delivered, identified by a deduplication key"""
+
+    __slots__ = ("key", "content", "remaining", "delivered")
+
+    def __init__(self, key, content, destinations):
+        self.key = key
+        self.content = content
+        self.remaining = destinations  # channels still to try
+        self.delivered = False  # accepted by at least one channel
+
+
+class AnnouncementRouter:
+    """
+    Maps announcement event types and challenge categories to channels.
+
+    Routes live in StateDB as (event_type, category, channel_id) rows where
+    either field may be ``*``. Announcements no route matches go to the
+    default channel. Channel objects are resolved once and cached until
+    Discord reports the channel deleted or inaccessible.
+
+    Args:
+        bot (discord.Client): Client used to resolve channels
+        db (AsyncStateDB): Database holding the routes
+        default_channel_id (int): Channel used when no route matches
+    """
+
+    def __init__(self, bot, db, default_channel_id):
+        self.bot = bot
+        self.db = db
+        self.default_channel_id = default_channel_id
+        self._channels = {}  # channel id -> channel object
+
+    async def channel_ids(self, event_type, category=None):
+        matched = {
+            channel_id
+            for route_type, route_category, channel_id in await self.db.get_routes()
+            if route_type in (event_type, ANY) and route_category in (category, ANY)
+        }
+        return sorted(matched) or [self.default_channel_id]
+
+    async def resolve(self, channel_id):
+        """Return the channel object for an id, or None if it is unreachable"""
+        channel = self._channels.get(channel_id)
+        if channel is not None:
+            return channel
+        channel = self.bot.get_channel(channel_id)
+        if channel is None:
+            logger.warning(
+                f"Channel {channel_id} not in cache - fetching it from Discord"
+            )
+            try:
+                channel = await self.bot.fetch_channel(channel_id)
+            except discord.HTTPException as e:
+                logger.error(f"Channel {channel_id} is not accessible: {e}")
+                return None
+        self._channels[channel_id] = channel
+        return channel
+
+    async def destinations(self, event_type, category=None):
+        """Resolve the channels an announcement of this type should go to"""
+        channels = []
+        for channel_id in await self.channel_ids(event_type, category):
+            channel = await self.resolve(channel_id)
+            if channel is not None:
+                channels.append(channel)
+        return channels
+
+    def forget(self, channel_id):
+        """Drop a cached channel so the next announcement resolves it again"""
+        self._channels.pop(channel_id, None)
+
+    async def routes(self):
+        return await self.db.get_routes()
+
+    async def add_route(self, event_type, channel_id, category=ANY):
+        await self.db.add_route(event_type, category or ANY, channel_id)
+
+    async def remove_route(self, event_type, channel_id, category=ANY):
+        return await self.db.remove_route(event_type, category or ANY, channel_id)
+
+
+class AnnouncementQueue:
+    """
+    Bounded queue decoupling announcement detection from Discord delivery.
+
+    Each channel gets its own queue and sender task, so a slow or rate
+    limited channel never holds up detection or other channels, and an
+    announcement fanned out to several channels is sent to all of them
+    concurrently. Each sender combines whatever is queued into messages of
+    up to 2000 characters and retries transient failures with exponential
+    backoff. Once every destination was tried, ``on_delivered`` is called
+    if at least one channel accepted the announcement, ``on_failed``
+    otherwise.
+
+    Args:
+        on_delivered: Coroutine function taking a list of Announcements
+        on_failed: Optional coroutine function taking the Announcements that
+            were given up on
+        on_unreachable: Optional function taking the id of a channel Discord
+            reported as deleted or inaccessible (403/404). The channel's
+            sender stops and everything still queued for it fails.
+        max_size (int): Announcements queued per channel before rejecting
+        max_retries (int): Attempts per message before giving up
+    """
+
+    def __init__(
+        self,
+        on_delivered,
+        on_failed=None,
+        on_unreachable=None,
+        max_size=100,
+        max_retries=5,
+    ):
+        self.on_delivered = on_delivered
+        self.on_failed = on_failed
+        self.on_unreachable = on_unreachable
+        self.max_size = max_size
+        self.max_retries = max_retries
+        self._queues = {}  # channel id -> asyncio.Queue
+        self._senders = {}  # channel id -> asyncio.Task
+        self._pending = set()  # keys queued or being sent
+
+    def __len__(self):
+        return len(self._pending)
+
+    def is_pending(self, key):
+        return key in self._pending
+
+    def has_pending(self):
+        return bool(self._pending)
+
+    def enqueue(self, channels, key, content):
+        """
+        Queue an announcement for channels without waiting for delivery.
+
+        Returns:
+            bool: False if the key is already pending, there is no channel or
+            every channel queue is full; the caller simply detects it again
+            on its next pass
+        """
+        if key in self._pending or not channels:
+            return False
+        queues = []
+        for channel in channels:
+            queue = self._queues.get(channel.id)
+            if queue is None:
+                queue = self._queues[channel.id] = asyncio.Queue(self.max_size)
+                self._senders[channel.id] = asyncio.create_task(
+                    self._sender(channel, queue)
+                )
+            if queue.full():
+                logger.warning(f"Announcement queue for channel {channel.id} is full")
+            else:
+                queues.append(queue)
+        if not queues:
+            return False
+
+        announcement = Announcement(key, content, len(queues))
+        for queue in queues:
+            queue.put_nowait(announcement)
+        self._pending.add(key)
+        return True
+
+    async def _sender(self, channel, queue):
+        carry = None
+        while True:
+            batch = [carry or await queue.get()]
+            carry = None
+            length = len(batch[0].content)
+            # Coalesce everything already queued that fits in one message
+            while not queue.empty():
+                announcement = queue.get_nowait()
+                if length + 1 + len(announcement.content) > MAX_MESSAGE_LENGTH:
+                    carry = announcement
+                    break
+                batch.append(announcement)
+                length += 1 + len(announcement.content)
+
+            sent = unreachable = False
+            try:
+                sent = await self._send(channel, batch)
+            except ChannelUnreachableError:
+                unreachable = True
+                # Retire this channel's queue, so the next announcement for it
+                # starts a new sender, and fail what was waiting in it
+                self._queues.pop(channel.id, None)
+                self._senders.pop(channel.id, None)
+                if carry is not None:
+                    batch.append(carry)
+                while not queue.empty():
+                    batch.append(queue.get_nowait())
+            except Exception as e:
+                logger.error(f"Error delivering announcements to {channel.id}: {e}")
+
+            # Settle announcements whose last destination this channel was
+            delivered, failed = [], []
+            for announcement in batch:
+                announcement.delivered = announcement.delivered or sent
+                announcement.remaining -= 1
+                if announcement.remaining == 0:
+                    settled = delivered if announcement.delivered else failed
+                    settled.append(announcement)
+            try:
+                if delivered:
+                    await self.on_delivered(delivered)
+                if failed and self.on_failed is not None:
+                    await self.on_failed(failed)
+            except Exception as e:
+                logger.error(f"Error settling announcements for {channel.id}: {e}")
+            finally:
+                for announcement in delivered + failed:
+                    self._pending.discard(announcement.key)
+            if unreachable:
+                if self.on_unreachable is not None:
+                    self.on_unreachable(channel.id)
+                return
+
+    async def _send(self, channel, batch):
+        content = "\n".join(announcement.content for announcement in batch)
+        for attempt in range(self.max_retries):
+            try:
+                with DISCORD_SEND_SECONDS.time():
+                    await channel.send(content)
+                logger.debug(
+                    f"Delivered {len(batch)} announcements to channel {channel.id}"
+                )
+                return True
+            except discord.HTTPException as e:
+                # discord.py already waits out 429s; retry what is left over
+                # and server errors, give up on permanent client errors
+                if e.status != 429 and e.status < 500:
+                    logger.error(
+                        f"Discord rejected announcement for channel {channel.id}: {e}"
+                    )
+                    if e.status in (403, 404):
+                        raise ChannelUnreachableError(channel.id) from e
+                    return False
+                error = e
+            except (OSError, asyncio.TimeoutError) as e:
+                error = e
+            if attempt + 1 < self.max_retries:
+                delay = min(2**attempt, 60)
+                logger.warning(
+                    f"Sending to channel {channel.id} failed ({error}), retrying in {delay}s"
+                )
+                await asyncio.sleep(delay)
+        logger.error(
+            f"Dropping {len(batch)} announcements for channel {channel.id} "
+            f"after {self.max_retries} attempts"
+        )
+        return False
+
+    async def close(self):
+        for task in self._senders.values():
+            task.cancel()
+        await asyncio.gather(*self._senders.values(), return_exceptions=True)
+        self._senders.clear()
+        self._queues.clear()
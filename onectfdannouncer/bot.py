@@ -2,15 +2,32 @@ import logging
 import discord
 from discord.ext import tasks
 from discord import app_commands
-from .config import DISCORD_TOKEN, ANNOUNCE_CHANNEL_ID, POLL_INTERVAL, LOG_LEVEL
+from .config import (
+    DISCORD_TOKEN,
+    ANNOUNCE_CHANNEL_ID,
+    POLL_INTERVAL,
+    LOG_LEVEL,
+    LOG_FORMAT,
+    HTTP_HOST,
+    HTTP_PORT,
+    WEBHOOK_ENABLED,
+    WEBHOOK_SECRET,
+    METRICS_ENABLED,
+    WATCHDOG_THRESHOLD,
+)
 from .commands import register_commands
 from .tasks import register_tasks
+from .http_server import HTTPServer
+from .webhook import register_webhook
+from .instances import load_instances
+from .logging_config import setup_logging
+from .metrics import register_metrics, register_instance_metrics
+from .watchdog import LoopWatchdog
 
-# Configure logging with environment variable
+# Configure logging with environment variables; records are formatted and
+# written by a background thread so logging never blocks the event loop
 log_level = getattr(logging, LOG_LEVEL, logging.INFO)
-logging.basicConfig(
-    level=log_level, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+setup_logging(log_level, LOG_FORMAT)
 logger = logging.getLogger(__name__)
 
 intents = discord.Intents.default()
@@ -20,12 +37,26 @@ class AnnouncerBot(discord.Client):
     def __init__(self):
         super().__init__(intents=intents)
         self.tree = app_commands.CommandTree(self)
+        self.instances = load_instances()
+        self.http_server = None
+        self.watchdog = LoopWatchdog(WATCHDOG_THRESHOLD)
+        register_instance_metrics(self.instances)
 
     async def setup_hook(self):
         logger.info("Setting up bot...")
         register_commands(self)
         logger.info(f"Registered {len(self.tree.get_commands())} commands")
         register_tasks(self)
+        self.watchdog.start()
+        if HTTP_PORT:
+            self.http_server = HTTPServer(HTTP_HOST, HTTP_PORT)
+            if WEBHOOK_ENABLED:
+                register_webhook(self.http_server, WEBHOOK_SECRET, self.instances)
+            if METRICS_ENABLED:
+                register_metrics(self.http_server)
+            await self.http_server.start()
+        elif METRICS_ENABLED:
+            logger.warning("METRICS_ENABLED has no effect without HTTP_PORT")
         logger.info("Syncing command tree...")
         try:
             synced = await self.tree.sync()
@@ -38,6 +69,14 @@ class AnnouncerBot(discord.Client):
             logger.error(f"Failed to sync command tree: {sync_error}")
         # Don't start polling task here - wait for on_ready
 
+    async def close(self):
+        if self.http_server is not None:
+            await self.http_server.stop()
+        await self.watchdog.stop()
+        for instance in self.instances:
+            await instance.close()
+        await super().close()
+
 
 bot = AnnouncerBot()
 
@@ -47,18 +86,25 @@ async def on_ready():
     logger.info(f"Logged in as {bot.user} (ID: {bot.user.id})")
     logger.info(f"Bot is ready and connected to {len(bot.guilds)} guild(s)")
 
-    # Start polling task only after bot is fully ready
-    if hasattr(bot, "poll_first_bloods"):
-        bot.poll_first_bloods.start()
-        logger.info("Started first blood polling task")
-    else:
-        logger.warning("poll_first_bloods task not found")
+    # Start polling tasks only after bot is fully ready
+    for instance in bot.instances:
+        if instance.poll_first_bloods is None:
+            logger.warning(f"poll_first_bloods task not found [{instance.name}]")
+        elif not instance.poll_first_bloods.is_running():
+            instance.poll_first_bloods.start()
+            logger.info(f"Started first blood polling task [{instance.name}]")
+        if (
+            instance.refresh_snapshots is not None
+            and not instance.refresh_snapshots.is_running()
+        ):
+            instance.refresh_snapshots.start()
 
 
 if __name__ == "__main__":
     logger.info("Starting bot...")
     try:
-        bot.run(DISCORD_TOKEN)
+        # discord.py logs through the handler configured above
+        bot.run(DISCORD_TOKEN, log_handler=None)
     except Exception as e:
         logger.error(f"Failed to start bot: {e}")
         raise
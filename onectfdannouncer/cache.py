@@ -0,0 +1,113 @@
+"""
+In-memory response cache with TTLs, LRU eviction and request coalescing.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    Bounded LRU cache for the results of async fetches.
+
+    Concurrent callers asking for the same missing key share a single
+    in-flight fetch. Entries older than their TTL but younger than
+    ``ttl + stale_for`` are still returned immediately while one background
+    refresh replaces them.
+
+    Args:
+        max_entries (int): Number of entries kept before evicting the least
+            recently used one
+        stale_for (float): Seconds past the TTL an entry may still be served
+    """
+
+    def __init__(self, max_entries=256, stale_for=30):
+        self.max_entries = max_entries
+        self.stale_for = stale_for
+        self._entries = OrderedDict()  # key -> (value, fetched_at)
+        self._inflight = {}  # key -> asyncio.Task
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0}
+
+    def __len__(self):
+        return len(self._entries)
+
+    async def get_or_fetch(self, key, ttl, fetch, serve_stale=True, cacheable=None):
+        """
+        Return the cached value for key, or await fetch() to produce it.
+
+        Args:
+            key: Hashable cache key
+            ttl (float): Seconds a fetched value is fresh; 0 only coalesces
+            fetch: Zero-argument coroutine function producing the value
+            serve_stale (bool): Whether an expired entry may be returned while
+                it is refreshed in the background
+            cacheable: Optional predicate deciding whether a value is stored
+
+        Returns:
+            The cached or freshly fetched value
+        """
+        entry = self._entries.get(key)
+        if entry is not None and ttl > 0:
+            value, fetched_at = entry
+            age = time.monotonic() - fetched_at
+            if age < ttl:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return value
+            if serve_stale and age < ttl + self.stale_for:
+                self._entries.move_to_end(key)
+                self.stats["stale_hits"] += 1
+                if key not in self._inflight:
+                    self._start_fetch(key, ttl, fetch, cacheable)
+                return value
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.stats["misses"] += 1
+            task = self._start_fetch(key, ttl, fetch, cacheable)
+        else:
+            self.stats["coalesced"] += 1
+        # Shield so one cancelled caller does not cancel the shared fetch
+        return await asyncio.shield(task)
+
+    def _start_fetch(self, key, ttl, fetch, cacheable):
+        task = asyncio.create_task(self._fetch(key, ttl, fetch, cacheable))
+        task.add_done_callback(self._log_failure)
+        self._inflight[key] = task
+        return task
+
+    async def _fetch(self, key, ttl, fetch, cacheable):
+        try:
+            value = await fetch()
+            if ttl > 0 and self.max_entries > 0:
+                if cacheable is None or cacheable(value):
+                    self._store(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def _store(self, key, value):
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Evicted {evicted} from response cache")
+
+    @staticmethod
+    def _log_failure(task):
+        # Background refreshes have no awaiting caller; retrieve their
+        # exception so it is logged once instead of warned about by asyncio
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Cached fetch failed: {task.exception()}")
+
+    def invalidate(self, key=None):
+        """Drop one key, or every entry when key is None"""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
@@ -1,20 +1,43 @@
 import logging
 import discord
 from discord import app_commands
-from .ctfd_api import CTFdAPI
-from .config import ANNOUNCE_CHANNEL_ID
-from .utils import sanitize_team_name
+from .utils import sanitize_team_name, sanitize_challenge_name, format_age
+from .profiling import profiled
+from .ratelimit import INTERACTIVE, request_priority
 
 logger = logging.getLogger(__name__)
-ctfd = CTFdAPI()
+
+# Categories listed by /stats, most solved first
+MAX_STAT_CATEGORIES = 8
 
 
 def register_commands(bot):
+    async def instance_autocomplete(interaction: discord.Interaction, current: str):
+        return [
+            app_commands.Choice(name=name, value=name)
+            for name in bot.instances.names()
+            if current.lower() in name.lower()
+        ][:25]
+
+    async def unknown_instance(interaction, instance):
+        message = f"❌ Unknown CTFd instance `{instance}`"
+        if interaction.response.is_done():
+            await interaction.followup.send(message, ephemeral=True)
+        else:
+            await interaction.response.send_message(message, ephemeral=True)
+
     @bot.tree.command(
         name="top10", description="List the top 10 teams on the scoreboard."
     )
-    async def top10(interaction: discord.Interaction):
+    @app_commands.describe(instance="CTFd instance (default: the main one)")
+    @app_commands.autocomplete(instance=instance_autocomplete)
+    @profiled("top10")
+    async def top10(interaction: discord.Interaction, instance: str = None):
         logger.info(f"Top10 command invoked by {interaction.user}")
+        inst = bot.instances.get(instance)
+        if inst is None:
+            await unknown_instance(interaction, instance)
+            return
 
         try:
             # Try to defer the response to give us more time
@@ -28,7 +51,12 @@ def register_commands(bot):
             logger.error(f"Failed to defer interaction: {defer_error}")
 
         try:
-            teams = ctfd.get_top_teams()
+            # Only wait for CTFd until the first snapshot exists
+            with request_priority(INTERACTIVE):
+                snapshot = inst.snapshot or await inst.refresh_snapshot()
+            if snapshot is None:
+                raise RuntimeError("no scoreboard snapshot available")
+            teams = snapshot.top(10)
             if not teams:
                 if interaction.response.is_done():
                     await interaction.followup.send(
@@ -42,10 +70,11 @@ def register_commands(bot):
 
             msg = "\n".join(
                 [
-                    f"{i+1}. {sanitize_team_name(team['name'])} ({team['score']})"
-                    for i, team in enumerate(teams)
+                    f"{i+1}. {sanitize_team_name(name)} ({score})"
+                    for i, (name, score) in enumerate(teams)
                 ]
             )
+            msg += f"\n-# Updated {format_age(snapshot.age)}"
 
             if interaction.response.is_done():
                 await interaction.followup.send(f"**Top 10 Teams:**\n{msg}")
@@ -66,8 +95,15 @@ def register_commands(bot):
                 logger.error(f"Failed to send error message: {followup_error}")
 
     @bot.tree.command(name="stats", description="Show CTF statistics and information.")
-    async def stats(interaction: discord.Interaction):
+    @app_commands.describe(instance="CTFd instance (default: the main one)")
+    @app_commands.autocomplete(instance=instance_autocomplete)
+    @profiled("stats")
+    async def stats(interaction: discord.Interaction, instance: str = None):
         logger.info(f"Stats command invoked by {interaction.user}")
+        inst = bot.instances.get(instance)
+        if inst is None:
+            await unknown_instance(interaction, instance)
+            return
 
         try:
             await interaction.response.defer()
@@ -78,65 +114,40 @@ def register_commands(bot):
             logger.error(f"Failed to defer interaction: {defer_error}")
 
         try:
-            # Fetch all data in parallel for better performance
-            import asyncio
-
-            config_task = asyncio.create_task(asyncio.to_thread(ctfd.get_ctf_config))
-            teams_task = asyncio.create_task(asyncio.to_thread(ctfd.get_all_teams))
-            users_task = asyncio.create_task(asyncio.to_thread(ctfd.get_all_users))
-            challenges_task = asyncio.create_task(
-                asyncio.to_thread(ctfd.get_challenges)
-            )
-            # Use new comprehensive statistics method
-            comprehensive_stats_task = asyncio.create_task(
-                asyncio.to_thread(ctfd.get_comprehensive_statistics)
-            )
-            # Use new method to get only correct submissions
-            correct_submissions_task = asyncio.create_task(
-                asyncio.to_thread(ctfd.get_submissions_with_type, 'correct')
-            )
-
-            config = await config_task
-            teams = await teams_task
-            users = await users_task
-            challenges = await challenges_task
-            comprehensive_stats = await comprehensive_stats_task
-            correct_submissions = await correct_submissions_task
+            # Render from the background snapshot; only the very first
+            # call waits for CTFd
+            with request_priority(INTERACTIVE):
+                snapshot = inst.snapshot or await inst.refresh_snapshot()
+            if snapshot is None:
+                raise RuntimeError("no scoreboard snapshot available")
+            team_count = snapshot.team_count
+            challenge_count = snapshot.challenge_count
+            comprehensive_stats = snapshot.statistics
+            correct_count = snapshot.correct_count
+            config_dict = snapshot.config
 
             # Build stats message
             stats_lines = []
 
-            # Convert config list to dict if needed
-            config_dict = {}
-            if isinstance(config, list):
-                for item in config:
-                    if isinstance(item, dict) and 'key' in item and 'value' in item:
-                        config_dict[item['key']] = item['value']
-            elif isinstance(config, dict):
-                config_dict = config
-
             # CTF Name
             ctf_name = config_dict.get("ctf_name", config_dict.get("name", "CTF"))
             stats_lines.append(f"🏆 **{ctf_name}**")
             stats_lines.append("")
 
             # Basic counts
-            stats_lines.append(f"👥 **Teams:** {len(teams)}")
-            stats_lines.append(f"👤 **Players:** {len(users)}")
-            stats_lines.append(f"🎯 **Challenges:** {len(challenges)}")
-            stats_lines.append(f"✅ **Correct Solves:** {len(correct_submissions)}")
+            stats_lines.append(f"👥 **Teams:** {team_count}")
+            stats_lines.append(f"👤 **Players:** {snapshot.user_count}")
+            stats_lines.append(f"🎯 **Challenges:** {challenge_count}")
+            stats_lines.append(f"✅ **Correct Solves:** {correct_count}")
             
             # If we have comprehensive statistics, show additional info
             if comprehensive_stats:
                 logger.debug(f"Comprehensive statistics available: {list(comprehensive_stats.keys())}")
                 
                 # Challenge solve statistics
-                challenge_stats = comprehensive_stats.get('challenge_solves', {})
-                if challenge_stats:
-                    logger.debug(f"Challenge solve statistics: {challenge_stats}")
-                    if isinstance(challenge_stats, dict):
-                        total_solves = sum(challenge_stats.values()) if challenge_stats.values() else len(correct_submissions)
-                        stats_lines.append(f"📊 **Total Solves (from stats):** {total_solves}")
+                if snapshot.solve_counts:
+                    total_solves = sum(snapshot.solve_counts.values())
+                    stats_lines.append(f"📊 **Total Solves (from stats):** {total_solves}")
                 
                 # Challenge percentages
                 challenge_percentages = comprehensive_stats.get('challenge_percentages', {})
@@ -157,11 +168,35 @@ def register_commands(bot):
                     stats_lines.append(f"📝 **Submission statistics available**")
             
             # Show solve rate based on challenges vs teams
-            if len(challenges) > 0 and len(teams) > 0:
-                max_possible_solves = len(challenges) * len(teams)
-                solve_rate = (len(correct_submissions) / max_possible_solves * 100) if max_possible_solves > 0 else 0
+            if challenge_count > 0 and team_count > 0:
+                max_possible_solves = challenge_count * team_count
+                solve_rate = (correct_count / max_possible_solves * 100) if max_possible_solves > 0 else 0
                 stats_lines.append(f"� **Solve Rate:** {solve_rate:.1f}%")
-            
+
+            # Breakdowns come from the local mirror, not from CTFd
+            try:
+                categories = await inst.db.category_breakdown()
+                first_bloods = await inst.db.first_blood_history(limit=3)
+            except Exception as mirror_error:
+                logger.error(f"Error querying the local CTFd mirror: {mirror_error}")
+                categories, first_bloods = [], []
+            if categories:
+                stats_lines.append("")
+                stats_lines.append("📂 **Categories:**")
+                for category, total, solved, solves in categories[:MAX_STAT_CATEGORIES]:
+                    name = sanitize_challenge_name(category or "Uncategorized")
+                    line = f"• {name}: {solved}/{total} solved, {solves} solves"
+                    if team_count > 0:
+                        line += f" ({solves / (total * team_count) * 100:.1f}%)"
+                    stats_lines.append(line)
+            if first_bloods:
+                stats_lines.append("")
+                stats_lines.append("🩸 **Latest First Bloods:**")
+                for challenge_name, _, account_name, _ in first_bloods:
+                    stats_lines.append(
+                        f"• {sanitize_challenge_name(challenge_name)} by {sanitize_team_name(account_name)}"
+                    )
+
             stats_lines.append("")
 
             # Timing information - CTFd typically uses 'start' and 'end' keys
@@ -253,6 +288,13 @@ def register_commands(bot):
                 except Exception as status_error:
                     logger.debug(f"Error determining CTF status: {status_error}")
 
+            if inst.ctfd.degraded:
+                stats_lines.append(
+                    f"⚠️ CTFd degraded (circuit opened "
+                    f"{format_age(inst.ctfd.breaker.open_for or 0)}), showing last known data"
+                )
+            stats_lines.append(f"-# Updated {format_age(snapshot.age)}")
+
             message = "\n".join(stats_lines)
             await interaction.followup.send(message)
             logger.info("Stats command completed successfully")
@@ -264,7 +306,117 @@ def register_commands(bot):
             except Exception as followup_error:
                 logger.error(f"Failed to send error message: {followup_error}")
 
+    event_type_choices = [
+        app_commands.Choice(name="First blood", value="first_blood"),
+        app_commands.Choice(name="Second/third blood", value="nth_blood"),
+        app_commands.Choice(name="First solve in category", value="category_first_blood"),
+        app_commands.Choice(name="Rank change", value="rank_change"),
+        app_commands.Choice(name="All events", value="*"),
+    ]
+
+    @bot.tree.command(
+        name="route_add", description="Send an announcement type to a channel."
+    )
+    @app_commands.describe(
+        event_type="Announcement type to route",
+        channel="Channel to announce in",
+        category="Only challenges in this category (default: all)",
+        instance="CTFd instance (default: the main one)",
+    )
+    @app_commands.choices(event_type=event_type_choices)
+    @app_commands.autocomplete(instance=instance_autocomplete)
+    @app_commands.default_permissions(manage_guild=True)
+    @app_commands.guild_only()
+    @profiled("route_add")
+    async def route_add(
+        interaction: discord.Interaction,
+        event_type: app_commands.Choice[str],
+        channel: discord.TextChannel,
+        category: str = "*",
+        instance: str = None,
+    ):
+        logger.info(f"Route add command invoked by {interaction.user}")
+        inst = bot.instances.get(instance)
+        if inst is None:
+            await unknown_instance(interaction, instance)
+            return
+        try:
+            await inst.router.add_route(
+                event_type.value, channel.id, category
+            )
+            await interaction.response.send_message(
+                f"✅ {event_type.name} announcements for category `{category}` now go to {channel.mention}",
+                ephemeral=True,
+            )
+        except Exception as e:
+            logger.error(f"Error in route_add command: {e}")
+            await interaction.response.send_message(
+                "❌ Error saving the route", ephemeral=True
+            )
+
+    @bot.tree.command(
+        name="route_remove", description="Stop sending an announcement type to a channel."
+    )
+    @app_commands.describe(
+        event_type="Announcement type of the route",
+        channel="Channel of the route",
+        category="Category of the route (default: all)",
+        instance="CTFd instance (default: the main one)",
+    )
+    @app_commands.choices(event_type=event_type_choices)
+    @app_commands.autocomplete(instance=instance_autocomplete)
+    @app_commands.default_permissions(manage_guild=True)
+    @app_commands.guild_only()
+    @profiled("route_remove")
+    async def route_remove(
+        interaction: discord.Interaction,
+        event_type: app_commands.Choice[str],
+        channel: discord.TextChannel,
+        category: str = "*",
+        instance: str = None,
+    ):
+        logger.info(f"Route remove command invoked by {interaction.user}")
+        inst = bot.instances.get(instance)
+        if inst is None:
+            await unknown_instance(interaction, instance)
+            return
+        try:
+            removed = await inst.router.remove_route(
+                event_type.value, channel.id, category
+            )
+            message = "✅ Route removed" if removed else "❌ No such route"
+            await interaction.response.send_message(message, ephemeral=True)
+        except Exception as e:
+            logger.error(f"Error in route_remove command: {e}")
+            await interaction.response.send_message(
+                "❌ Error removing the route", ephemeral=True
+            )
+
+    @bot.tree.command(name="routes", description="List announcement routes.")
+    @app_commands.describe(instance="CTFd instance (default: the main one)")
+    @app_commands.autocomplete(instance=instance_autocomplete)
+    @app_commands.default_permissions(manage_guild=True)
+    @app_commands.guild_only()
+    @profiled("routes")
+    async def routes(interaction: discord.Interaction, instance: str = None):
+        logger.info(f"Routes command invoked by {interaction.user}")
+        inst = bot.instances.get(instance)
+        if inst is None:
+            await unknown_instance(interaction, instance)
+            return
+        router = inst.router
+        lines = [
+            f"• `{event_type}` / `{category}` → <#{channel_id}>"
+            for event_type, category, channel_id in await router.routes()
+        ]
+        if not lines:
+            lines = [f"No routes - everything goes to <#{router.default_channel_id}>"]
+        await interaction.response.send_message(
+            "**Announcement routes:**\n" + "\n".join(lines), ephemeral=True
+        )
+
     @bot.tree.command(name="about", description="Show information about this bot")
+    @profiled("about")
     async def about(interaction: discord.Interaction):
         """Show information about the bot including source code and attribution"""
         logger.info(f"About command requested by {interaction.user}")
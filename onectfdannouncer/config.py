@@ -8,7 +8,94 @@ CTFD_URL = os.getenv("CTFD_URL")
 CTFD_API_KEY = os.getenv("CTFD_API_KEY")
 ANNOUNCE_CHANNEL_ID = int(os.getenv("ANNOUNCE_CHANNEL_ID", "0"))
 POLL_INTERVAL = int(os.getenv("POLL_INTERVAL", "30"))  # seconds
+# The poll interval adapts between these bounds: it drops to the minimum when
+# new solves show up and is multiplied by POLL_BACKOFF after each idle poll.
+# By default it never polls faster than POLL_INTERVAL.
+POLL_INTERVAL_MIN = int(os.getenv("POLL_INTERVAL_MIN", str(POLL_INTERVAL)))  # seconds
+POLL_INTERVAL_MAX = int(os.getenv("POLL_INTERVAL_MAX", str(4 * POLL_INTERVAL)))  # seconds
+POLL_BACKOFF = float(os.getenv("POLL_BACKOFF", "2"))
+# "solves" works with any token, "submissions" needs an admin token
+FIRST_BLOOD_SOURCE = os.getenv("FIRST_BLOOD_SOURCE", "solves").lower()
+# Solve ranks announced per challenge (1 = first blood only, 3 = up to third)
+BLOOD_RANKS = max(int(os.getenv("BLOOD_RANKS", "1")), 1)
+# Also announce the first solve in each challenge category
+CATEGORY_FIRST_BLOOD = os.getenv("CATEGORY_FIRST_BLOOD", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()  # Default to INFO
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()  # "text" or "json"
+CTFD_TIMEOUT = float(os.getenv("CTFD_TIMEOUT", "30"))  # seconds, whole request
+CTFD_CONNECT_TIMEOUT = float(os.getenv("CTFD_CONNECT_TIMEOUT", "10"))  # seconds
+CTFD_MAX_CONNECTIONS = int(os.getenv("CTFD_MAX_CONNECTIONS", "20"))
+# Pages of one listing fetched at the same time
+CTFD_PAGE_CONCURRENCY = int(os.getenv("CTFD_PAGE_CONCURRENCY", "4"))
+# Per-challenge solves requests in flight at once; 1 fetches them one by one
+CTFD_SOLVES_CONCURRENCY = max(int(os.getenv("CTFD_SOLVES_CONCURRENCY", "8")), 1)
+# Retries per request and the share of regular requests they may add
+CTFD_MAX_RETRIES = int(os.getenv("CTFD_MAX_RETRIES", "2"))
+CTFD_RETRY_BUDGET = float(os.getenv("CTFD_RETRY_BUDGET", "0.2"))
+# Consecutive failures that open the circuit, and seconds it stays open
+CTFD_BREAKER_THRESHOLD = int(os.getenv("CTFD_BREAKER_THRESHOLD", "5"))
+CTFD_BREAKER_RESET = float(os.getenv("CTFD_BREAKER_RESET", "30"))
+# Client-side rate limit in request tokens per second shared by every caller
+# (0 disables it), its burst, and how long a slash command may queue for it
+CTFD_RATE_LIMIT = float(os.getenv("CTFD_RATE_LIMIT", "0"))
+CTFD_RATE_BURST = float(os.getenv("CTFD_RATE_BURST", "0"))  # 0: one second's worth
+CTFD_RATE_MAX_WAIT = float(os.getenv("CTFD_RATE_MAX_WAIT", "2"))  # seconds
+CTFD_CACHE_SIZE = int(os.getenv("CTFD_CACHE_SIZE", "256"))  # 0 disables caching
+CTFD_CACHE_STALE = float(os.getenv("CTFD_CACHE_STALE", "30"))  # seconds
+# How often the scoreboard snapshot behind /top10 and /stats is refreshed
+SNAPSHOT_INTERVAL = int(os.getenv("SNAPSHOT_INTERVAL", "15"))  # seconds
+# Rank change announcements: size of the top they cover (0, the default,
+# disables them), places a team must climb within it, cooldown per team and
+# cap per refresh
+RANK_CHANGE_TOP = int(os.getenv("RANK_CHANGE_TOP", "0"))
+RANK_CHANGE_MIN_JUMP = int(os.getenv("RANK_CHANGE_MIN_JUMP", "0"))
+RANK_CHANGE_COOLDOWN = float(os.getenv("RANK_CHANGE_COOLDOWN", "300"))
+RANK_CHANGE_MAX_EVENTS = int(os.getenv("RANK_CHANGE_MAX_EVENTS", "5"))
+# Announcements waiting for delivery per channel
+ANNOUNCE_QUEUE_SIZE = int(os.getenv("ANNOUNCE_QUEUE_SIZE", "100"))
+# Optional HTTP listener (0 disables it)
+HTTP_HOST = os.getenv("HTTP_HOST", "0.0.0.0")
+HTTP_PORT = int(os.getenv("HTTP_PORT", "0"))
+# Shared secret for pushed solve events; setting it enables the webhook
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
+WEBHOOK_ENABLED = bool(HTTP_PORT and WEBHOOK_SECRET)
+# Serve Prometheus metrics on /metrics of the HTTP listener
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+# Log the loop thread's stack when the event loop is blocked this long (0 disables)
+WATCHDOG_THRESHOLD = float(os.getenv("WATCHDOG_THRESHOLD", "1.0"))  # seconds
+# Directory receiving a cProfile per slash command and poll cycle (unset disables)
+PROFILE_DIR = os.getenv("PROFILE_DIR", "")
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))  # newest profiles kept
+# Reconciliation poll interval while solve events are pushed
+WEBHOOK_POLL_INTERVAL = int(os.getenv("WEBHOOK_POLL_INTERVAL", "300"))  # seconds
 
 if not all([DISCORD_TOKEN, CTFD_URL, CTFD_API_KEY, ANNOUNCE_CHANNEL_ID]):
     raise ValueError("Missing one or more required environment variables.")
+
+# Extra CTFd instances served by the same bot, as CTFD_INSTANCES=ctf2,ctf3
+# with CTFD_URL_<NAME>, CTFD_API_KEY_<NAME> and optionally
+# ANNOUNCE_CHANNEL_ID_<NAME> for each of them. CTFD_URL/CTFD_API_KEY configure
+# the instance named "default".
+CTFD_INSTANCES = []
+for _name in filter(None, (n.strip() for n in os.getenv("CTFD_INSTANCES", "").split(","))):
+    if _name == "default" or any(i["name"] == _name for i in CTFD_INSTANCES):
+        raise ValueError(f"Duplicate CTFd instance name {_name!r} in CTFD_INSTANCES.")
+    _suffix = _name.upper().replace("-", "_")
+    _url = os.getenv(f"CTFD_URL_{_suffix}")
+    _api_key = os.getenv(f"CTFD_API_KEY_{_suffix}")
+    if not _url or not _api_key:
+        raise ValueError(f"Missing CTFD_URL_{_suffix} or CTFD_API_KEY_{_suffix}.")
+    CTFD_INSTANCES.append(
+        {
+            "name": _name,
+            "url": _url,
+            "api_key": _api_key,
+            "channel_id": int(
+                os.getenv(f"ANNOUNCE_CHANNEL_ID_{_suffix}", str(ANNOUNCE_CHANNEL_ID))
+            ),
+        }
+    )
@@ -1,36 +1,485 @@
+import asyncio
+import hashlib
+import json
 import logging
-import requests
-from .config import CTFD_URL, CTFD_API_KEY
+import time
+from collections import OrderedDict
+import aiohttp
+from .config import (
+    CTFD_URL,
+    CTFD_API_KEY,
+    CTFD_TIMEOUT,
+    CTFD_CONNECT_TIMEOUT,
+    CTFD_MAX_CONNECTIONS,
+    CTFD_PAGE_CONCURRENCY,
+    CTFD_SOLVES_CONCURRENCY,
+    CTFD_CACHE_SIZE,
+    CTFD_CACHE_STALE,
+    CTFD_MAX_RETRIES,
+    CTFD_RETRY_BUDGET,
+    CTFD_BREAKER_THRESHOLD,
+    CTFD_BREAKER_RESET,
+    CTFD_RATE_LIMIT,
+    CTFD_RATE_BURST,
+    CTFD_RATE_MAX_WAIT,
+)
+from .cache import TTLCache
+from .ratelimit import INTERACTIVE, RateLimiter, current_priority
+from .resilience import CLOSED, CircuitBreaker, RetryBudget, backoff_delay
+from .metrics import CTFD_REQUEST_SECONDS, CTFD_REQUESTS, endpoint_label
 
 logger = logging.getLogger(__name__)
 
+# Largest page size CTFd allows for paginated listings
+PAGE_SIZE = 100
+
+# Seconds a response stays fresh in the cache, and whether it may be served
+# stale while refreshing, by longest matching path prefix; numeric path
+# segments match {id}. The poller reads challenges and submissions, so those
+# are never served stale, and a pushed solve event must see the solve it
+# reports. A TTL of 0 still coalesces concurrent identical requests.
+CACHE_POLICIES = {
+    "/api/v1/scoreboard": (10, True),
+    "/api/v1/challenges": (5, False),
+    "/api/v1/challenges/{id}/solves": (0, False),
+    "/api/v1/configs": (300, True),
+    "/api/v1/statistics": (30, True),
+    "/api/v1/users": (60, True),
+    "/api/v1/teams": (60, True),
+    "/api/v1/submissions": (0, False),
+}
+
+
+# Total timeout in seconds by longest matching path prefix; other paths use
+# CTFD_TIMEOUT. Small, hot endpoints fail fast so a slow CTFd is noticed
+# before a poll cycle stalls; big listings get more time per page.
+ENDPOINT_TIMEOUTS = {
+    "/api/v1/challenges": 10,
+    "/api/v1/scoreboard": 10,
+    "/api/v1/configs": 10,
+    "/api/v1/statistics": 15,
+    "/api/v1/submissions": 20,
+    "/api/v1/users": 20,
+    "/api/v1/teams": 20,
+}
+
+# Rate limiter tokens per request by longest matching path prefix; other
+# paths cost 1. Listings make CTFd query and serialize many rows.
+ENDPOINT_WEIGHTS = {
+    "/api/v1/scoreboard": 2,
+    "/api/v1/statistics": 2,
+    "/api/v1/submissions": 2,
+    "/api/v1/users": 2,
+    "/api/v1/teams": 2,
+}
+
+# Longest a request of a priority class queues for the rate limiter; the
+# others wait as long as it takes
+MAX_WAIT = {INTERACTIVE: CTFD_RATE_MAX_WAIT}
+
+# Seconds before hidden and banned accounts are read again while no unknown
+# account shows up
+HIDDEN_ACCOUNTS_TTL = 600
+
+# Responses remembered for conditional requests, by count and by the total
+# size of their bodies; every page of a listing is a response of its own
+MAX_VALIDATORS = 1024
+MAX_VALIDATOR_BYTES = 16 * 1024 * 1024
+
+
+def cache_policy(path):
+    """Return the (ttl, serve_stale) cache policy for a CTFd API path"""
+    path = endpoint_label(path)
+    matches = [prefix for prefix in CACHE_POLICIES if path.startswith(prefix)]
+    return CACHE_POLICIES[max(matches, key=len)] if matches else (0, False)
+
+
+def endpoint_weight(path):
+    """Return the rate limiter tokens a request to a CTFd API path costs"""
+    matches = [prefix for prefix in ENDPOINT_WEIGHTS if path.startswith(prefix)]
+    return ENDPOINT_WEIGHTS[max(matches, key=len)] if matches else 1
+
+
+def endpoint_timeout(path):
+    """Return the aiohttp timeout for a CTFd API path"""
+    matches = [prefix for prefix in ENDPOINT_TIMEOUTS if path.startswith(prefix)]
+    total = ENDPOINT_TIMEOUTS[max(matches, key=len)] if matches else CTFD_TIMEOUT
+    return aiohttp.ClientTimeout(
+        total=min(total, CTFD_TIMEOUT), connect=CTFD_CONNECT_TIMEOUT
+    )
+
+
+class CTFdAPIError(Exception):
+    """Raised when CTFd answers with an unsuccessful HTTP status"""
+
+    def __init__(self, status, url):
+        super().__init__(f"{status} error for url: {url}")
+        self.status = status
+        self.url = url
+
+
+class CTFdUnavailableError(Exception):
+    """Raised when the circuit is open and there is no last good response"""
+
+    def __init__(self, url):
+        super().__init__(f"CTFd unavailable (circuit open) for url: {url}")
+        self.url = url
+
+
+class CTFdRateLimitedError(Exception):
+    """Raised when a request gave up waiting for the rate limiter and there is
+    no last good response"""
+
+    def __init__(self, url):
+        super().__init__(f"Client rate limit reached for url: {url}")
+        self.url = url
+
+
+class CTFdResponse:
+    """Fully read CTFd response, detached from the aiohttp connection"""
+
+    def __init__(self, status, url, headers, text, digest=None):
+        self.status_code = status
+        self.url = url
+        self.headers = headers
+        self.text = text
+        self.digest = digest
+        self._data = None
+
+    def json(self):
+        # Parsed once and shared by every caller reusing this response
+        if self._data is None:
+            self._data = json.loads(self.text)
+        return self._data
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise CTFdAPIError(self.status_code, self.url)
+
 
 class CTFdAPI:
-    def __init__(self):
-        self.base_url = CTFD_URL.rstrip("/")
+    def __init__(self, base_url=CTFD_URL, api_key=CTFD_API_KEY):
+        self.base_url = base_url.rstrip("/")
         self.headers = {
-            "Authorization": f"Token {CTFD_API_KEY}",
+            "Authorization": f"Token {api_key}",
             "Content-Type": "application/json",
             "Accept": "application/json",
         }
+        self.timeout = aiohttp.ClientTimeout(
+            total=CTFD_TIMEOUT, connect=CTFD_CONNECT_TIMEOUT
+        )
+        self._session = None
+        self.cache = TTLCache(max_entries=CTFD_CACHE_SIZE, stale_for=CTFD_CACHE_STALE)
+        # url -> last successful response, for conditional GETs
+        self._validators = OrderedDict()
+        self._validator_bytes = 0
+        self.conditional_stats = {"not_modified": 0, "unchanged": 0, "changed": 0}
+        # "teams"/"users" -> (known ids, hidden or banned ids, monotonic read time)
+        self._hidden_accounts = {}
+        self.breaker = CircuitBreaker(
+            self.base_url, CTFD_BREAKER_THRESHOLD, CTFD_BREAKER_RESET
+        )
+        self.retry_budget = RetryBudget(CTFD_RETRY_BUDGET)
+        self.resilience_stats = {
+            "retries": 0,
+            "budget_exhausted": 0,
+            "short_circuited": 0,
+            "served_last_good": 0,
+            "rate_limited": 0,
+        }
+        self.limiter = (
+            RateLimiter(CTFD_RATE_LIMIT, CTFD_RATE_BURST or None)
+            if CTFD_RATE_LIMIT > 0
+            else None
+        )
         logger.info(f"CTFd API initialized for {self.base_url}")
-        logger.debug(f"Using API token: {CTFD_API_KEY[:20]}...")
+        logger.debug(f"Using API token: {api_key[:20]}...")
 
-    def test_connection(self):
+    def _get_session(self):
+        """Return the shared keep-alive session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=CTFD_MAX_CONNECTIONS, keepalive_timeout=60
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector, timeout=self.timeout
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            logger.debug("Closed CTFd API session")
+
+    async def _get(self, path, params=None, auth=True, timeout=None):
+        """GET a CTFd path through the response cache
+
+        Authenticated requests are cached per path and query parameters, and
+        concurrent identical requests share one round trip. Only successful
+        responses are stored.
+        """
+        if not auth:
+            return await self._fetch(path, params, auth, timeout)
+        key = (path, tuple(sorted((params or {}).items())))
+        ttl, serve_stale = cache_policy(path)
+        return await self.cache.get_or_fetch(
+            key,
+            ttl,
+            lambda: self._fetch(path, params, auth, timeout),
+            serve_stale=serve_stale,
+            cacheable=lambda resp: resp.status_code < 400,
+        )
+
+    @property
+    def conditional_hit_rate(self):
+        """Share of conditional GETs whose previous parsed payload was reused"""
+        stats = self.conditional_stats
+        total = sum(stats.values())
+        return (stats["not_modified"] + stats["unchanged"]) / total if total else 0.0
+
+    @property
+    def degraded(self):
+        """True while CTFd is considered down and requests are short-circuited"""
+        return self.breaker.state != CLOSED
+
+    async def _fetch(self, path, params=None, auth=True, timeout=None):
+        """GET a CTFd path with retries, falling back to the last good response
+
+        Connection errors, timeouts, 429 and 5xx responses are retried with
+        jittered exponential backoff while the shared retry budget allows it.
+        They count as failures for the circuit breaker; while it is open no
+        request goes out.
+
+        Every attempt takes its endpoint's weight from the rate limiter, in
+        the priority class of the calling context. Slash command requests
+        that would queue too long give up instead.
+
+        When a request cannot be answered, the last successful response for
+        the same path and parameters is returned if there is one.
+        """
+        validator_key = (path, tuple(sorted((params or {}).items())))
+        timeout = timeout or endpoint_timeout(path)
+        error = None
+        response = None
+        rate_limited = False
+        priority = current_priority()
+        self.retry_budget.deposit()
+        for attempt in range(CTFD_MAX_RETRIES + 1):
+            if attempt > 0:
+                if not self.retry_budget.withdraw():
+                    self.resilience_stats["budget_exhausted"] += 1
+                    break
+                self.resilience_stats["retries"] += 1
+                await asyncio.sleep(backoff_delay(attempt - 1))
+            # Before the breaker, which expects a result for every allowed call
+            if self.limiter is not None and not await self.limiter.acquire(
+                endpoint_weight(path), priority, MAX_WAIT.get(priority)
+            ):
+                self.resilience_stats["rate_limited"] += 1
+                rate_limited = True
+                break
+            if not self.breaker.allow():
+                self.resilience_stats["short_circuited"] += 1
+                break
+            try:
+                response = await self._request(path, params, auth, timeout)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = e
+                self.breaker.record_failure()
+                logger.warning(
+                    f"Request to {path} failed (attempt {attempt + 1}): "
+                    f"{type(e).__name__}: {e}"
+                )
+                continue
+            except Exception:
+                # Still a failed call, e.g. an undecodable body
+                self.breaker.record_failure()
+                raise
+            except BaseException:
+                # Cancelled: no verdict on CTFd, but the trial slot is freed
+                self.breaker.release()
+                raise
+            if response.status_code == 429 or response.status_code >= 500:
+                self.breaker.record_failure()
+                logger.warning(
+                    f"Request to {path} returned {response.status_code} (attempt {attempt + 1})"
+                )
+                continue
+            self.breaker.record_success()
+            return response
+
+        last_good = self._validators.get(validator_key) if auth else None
+        if last_good is not None:
+            self.resilience_stats["served_last_good"] += 1
+            logger.warning(f"Serving last good response for {path}")
+            return last_good
+        if response is not None:
+            return response
+        if error is not None:
+            raise error
+        if rate_limited:
+            raise CTFdRateLimitedError(f"{self.base_url}{path}")
+        raise CTFdUnavailableError(f"{self.base_url}{path}")
+
+    async def _request(self, path, params=None, auth=True, timeout=None):
+        """GET a CTFd path once and return the fully read response
+
+        Authenticated requests are conditional: the ETag/Last-Modified of the
+        previous response is sent back, and a 304 reuses the previous
+        response. Servers without validators are handled by hashing the body,
+        so an unchanged payload is not decoded and parsed again either.
+        """
+        url = f"{self.base_url}{path}"
+        headers = None
+        previous = None
+        if auth:
+            headers = self.headers
+            validator_key = (path, tuple(sorted((params or {}).items())))
+            previous = self._validators.get(validator_key)
+            if previous is not None:
+                headers = dict(headers)
+                if "ETag" in previous.headers:
+                    headers["If-None-Match"] = previous.headers["ETag"]
+                if "Last-Modified" in previous.headers:
+                    headers["If-Modified-Since"] = previous.headers["Last-Modified"]
+
+        session = self._get_session()
+        endpoint = endpoint_label(path)
+        status = "error"
+        start = time.perf_counter()
+        try:
+            async with session.get(
+                url,
+                params=params,
+                headers=headers,
+                timeout=timeout,
+            ) as resp:
+                status = str(resp.status)
+                if resp.status == 304 and previous is not None:
+                    self.conditional_stats["not_modified"] += 1
+                    return previous
+
+                body = await resp.read()
+                digest = hashlib.blake2b(body, digest_size=16).digest()
+                if (
+                    previous is not None
+                    and resp.status == previous.status_code
+                    and digest == previous.digest
+                ):
+                    self.conditional_stats["unchanged"] += 1
+                    return previous
+
+                text = await resp.text()
+                response = CTFdResponse(resp.status, url, resp.headers, text, digest)
+        finally:
+            CTFD_REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint)
+            CTFD_REQUESTS.inc(endpoint, status)
+
+        if auth and resp.status < 400:
+            self.conditional_stats["changed"] += 1
+            self._remember(validator_key, response)
+        return response
+
+    def _remember(self, validator_key, response):
+        """Keep a response for conditional requests, evicting the least
+        recently stored ones past MAX_VALIDATORS or MAX_VALIDATOR_BYTES"""
+        previous = self._validators.pop(validator_key, None)
+        if previous is not None:
+            self._validator_bytes -= len(previous.text)
+        self._validators[validator_key] = response
+        self._validator_bytes += len(response.text)
+        while len(self._validators) > 1 and (
+            len(self._validators) > MAX_VALIDATORS
+            or self._validator_bytes > MAX_VALIDATOR_BYTES
+        ):
+            _, evicted = self._validators.popitem(last=False)
+            self._validator_bytes -= len(evicted.text)
+
+    async def _get_page(self, path, params, page):
+        """Fetch one page of a paginated listing as (items, pagination meta)"""
+        resp = await self._get(path, params={**params, "page": page})
+        resp.raise_for_status()
+        data = resp.json()
+        return data.get("data", []), data.get("meta", {}).get("pagination", {})
+
+    async def _iter_remaining_pages(self, path, params, pages):
+        """Yield the items of the given pages in order, fetched concurrently
+
+        At most CTFD_PAGE_CONCURRENCY requests are in flight at once.
+        """
+        semaphore = asyncio.Semaphore(CTFD_PAGE_CONCURRENCY)
+
+        async def fetch(page):
+            async with semaphore:
+                items, _ = await self._get_page(path, params, page)
+                return items
+
+        tasks = [asyncio.create_task(fetch(page)) for page in pages]
+        try:
+            for task in tasks:
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+            # Collect pages that failed too, so no exception goes unretrieved;
+            # the first error still propagates from the await above
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def iter_pages(self, path, params=None):
+        """Yield the items of every page of a paginated CTFd listing
+
+        The first page is read to learn the page count from
+        meta.pagination, the remaining pages are then fetched concurrently.
+        Listings without pagination metadata are a single page.
+        """
+        params = {"per_page": PAGE_SIZE, **(params or {})}
+        items, pagination = await self._get_page(path, params, 1)
+        yield items
+        pages = pagination.get("pages") or 1
+        if pages > 1:
+            logger.debug(f"Fetching {pages - 1} more pages of {path}")
+            async for items in self._iter_remaining_pages(
+                path, params, range(2, pages + 1)
+            ):
+                yield items
+
+    async def get_paginated(self, path, params=None):
+        """Return the merged items of every page of a paginated CTFd listing"""
+        merged = []
+        async for items in self.iter_pages(path, params):
+            merged.extend(items)
+        return merged
+
+    async def get_count(self, path, params=None):
+        """Return the number of items in a paginated CTFd listing
+
+        Only a one-item page is requested; the count comes from
+        meta.pagination.total. Listings without pagination metadata are
+        returned whole, so their length is used instead.
+        """
+        items, pagination = await self._get_page(
+            path, {**(params or {}), "per_page": 1}, 1
+        )
+        total = pagination.get("total")
+        return total if total is not None else len(items)
+
+    async def test_connection(self):
         """Test basic connectivity to CTFd instance"""
         try:
+            timeout = aiohttp.ClientTimeout(total=10)
+
             # First test if the base URL is reachable
-            resp = requests.get(self.base_url, timeout=10)
-            logger.info(f"Base URL {self.base_url} returned status {resp.status_code}")
+            resp = await self._get("", auth=False, timeout=timeout)
+            logger.info(
+                f"Base URL {self.base_url} returned status {resp.status_code}"
+            )
 
             # Test API endpoint without auth
-            resp = requests.get(f"{self.base_url}/api/v1/config", timeout=10)
+            resp = await self._get("/api/v1/config", auth=False, timeout=timeout)
             logger.info(f"Config endpoint (no auth) returned status {resp.status_code}")
 
             # Test with auth
-            resp = requests.get(
-                f"{self.base_url}/api/v1/config", headers=self.headers, timeout=10
-            )
+            resp = await self._get("/api/v1/config", timeout=timeout)
             logger.info(
                 f"Config endpoint (with auth) returned status {resp.status_code}"
             )
@@ -40,72 +489,97 @@ class CTFdAPI:
             logger.error(f"Connection test failed: {e}")
             return False
 
-    def get_top_teams(self, limit=10):
+    async def get_top_teams(self, limit=10):
         try:
             logger.debug(f"Fetching top {limit} teams from scoreboard")
-            resp = requests.get(
-                f"{self.base_url}/api/v1/scoreboard", headers=self.headers
-            )
+            resp = await self._get("/api/v1/scoreboard")
             resp.raise_for_status()
             data = resp.json()
             teams = data.get("data", [])[:limit]
-            logger.info(f"Successfully fetched {len(teams)} teams")
+            logger.debug(f"Successfully fetched {len(teams)} teams")
             return teams
         except Exception as e:
             logger.error(f"Error fetching top teams: {e}")
             raise
 
-    def get_challenges(self):
+    async def get_challenges(self):
         try:
             logger.debug("Fetching challenges from CTFd")
-            resp = requests.get(
-                f"{self.base_url}/api/v1/challenges", headers=self.headers
-            )
-            logger.debug(f"Response status: {resp.status_code}")
-            logger.debug(f"Response headers: {dict(resp.headers)}")
-            logger.debug(f"Response content (first 200 chars): {resp.text[:200]}")
-
-            resp.raise_for_status()
-
-            if not resp.text.strip():
-                logger.error("Received empty response from CTFd API")
-                return []
-
             try:
-                challenges = resp.json().get("data", [])
+                challenges = await self.get_paginated("/api/v1/challenges")
                 logger.debug(f"Fetched {len(challenges)} challenges")
                 return challenges
             except ValueError as json_error:
                 logger.error(f"Failed to parse JSON response: {json_error}")
-                logger.error(f"Raw response: {resp.text}")
                 return []
-        except requests.exceptions.RequestException as req_error:
+        except (aiohttp.ClientError, CTFdAPIError) as req_error:
             logger.error(f"HTTP error fetching challenges: {req_error}")
             raise
         except Exception as e:
             logger.error(f"Unexpected error fetching challenges: {e}")
             raise
 
-    def get_solves(self, challenge_id):
+    async def get_challenge(self, challenge_id):
         try:
-            logger.debug(f"Fetching solves for challenge {challenge_id}")
-            resp = requests.get(
-                f"{self.base_url}/api/v1/challenges/{challenge_id}/solves",
-                headers=self.headers,
-            )
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Fetching challenge {challenge_id}")
+            resp = await self._get(f"/api/v1/challenges/{challenge_id}")
+            resp.raise_for_status()
+            return resp.json().get("data", {})
+        except Exception as e:
+            logger.error(f"Error fetching challenge {challenge_id}: {e}")
+            raise
+
+    async def get_solves(self, challenge_id):
+        try:
+            # Called once per challenge per poll, so keep it cheap without DEBUG
+            debug = logger.isEnabledFor(logging.DEBUG)
+            if debug:
+                logger.debug(f"Fetching solves for challenge {challenge_id}")
+            resp = await self._get(f"/api/v1/challenges/{challenge_id}/solves")
             resp.raise_for_status()
             solves = resp.json().get("data", [])
-            logger.debug(f"Found {len(solves)} solves for challenge {challenge_id}")
+            if debug:
+                logger.debug(f"Found {len(solves)} solves for challenge {challenge_id}")
             return solves
         except Exception as e:
             logger.error(f"Error fetching solves for challenge {challenge_id}: {e}")
             raise
 
-    def get_ctf_config(self):
+    async def iter_solves(self, challenge_ids):
+        """Yield (challenge id, solves) in the given order, fetched concurrently
+
+        Requests start in the given order with at most
+        CTFD_SOLVES_CONCURRENCY in flight, so a full sweep takes about
+        N / CTFD_SOLVES_CONCURRENCY round trips instead of N. A failed
+        request yields its exception in place of the solves, so one
+        challenge does not hold up the others.
+        """
+        semaphore = asyncio.Semaphore(CTFD_SOLVES_CONCURRENCY)
+
+        async def fetch(challenge_id):
+            async with semaphore:
+                try:
+                    return await self.get_solves(challenge_id)
+                except Exception as e:
+                    return e
+
+        tasks = [
+            asyncio.create_task(fetch(challenge_id)) for challenge_id in challenge_ids
+        ]
+        try:
+            for challenge_id, task in zip(challenge_ids, tasks):
+                yield challenge_id, await task
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def get_ctf_config(self):
         """Get CTF configuration using the official configs endpoint"""
         try:
             logger.debug("Fetching CTF configuration")
-            resp = requests.get(f"{self.base_url}/api/v1/configs", headers=self.headers)
+            resp = await self._get("/api/v1/configs")
 
             if resp.status_code == 200:
                 data = resp.json()
@@ -120,14 +594,11 @@ class CTFdAPI:
             logger.error(f"Error fetching CTF config: {e}")
             return {}
 
-    def get_statistics_challenge_solves(self):
+    async def get_statistics_challenge_solves(self):
         """Get challenge solve statistics using the official statistics endpoint"""
         try:
             logger.debug("Fetching challenge solve statistics")
-            resp = requests.get(
-                f"{self.base_url}/api/v1/statistics/challenges/solves",
-                headers=self.headers,
-            )
+            resp = await self._get("/api/v1/statistics/challenges/solves")
             if resp.status_code == 200:
                 data = resp.json()
                 if data.get("success"):
@@ -139,13 +610,11 @@ class CTFdAPI:
             logger.error(f"Error fetching challenge solve statistics: {e}")
             return {}
 
-    def get_statistics_teams(self):
+    async def get_statistics_teams(self):
         """Get team statistics using the official statistics endpoint"""
         try:
             logger.debug("Fetching team statistics")
-            resp = requests.get(
-                f"{self.base_url}/api/v1/statistics/teams", headers=self.headers
-            )
+            resp = await self._get("/api/v1/statistics/teams")
             if resp.status_code == 200:
                 data = resp.json()
                 if data.get("success"):
@@ -157,53 +626,26 @@ class CTFdAPI:
             logger.error(f"Error fetching team statistics: {e}")
             return {}
 
-    def get_comprehensive_statistics(self):
+    async def get_comprehensive_statistics(self):
         """Get comprehensive statistics including solve counts and percentages"""
         try:
-            stats = {}
-
-            # Get challenge solve statistics (solve counts per challenge)
-            logger.debug("Fetching comprehensive challenge statistics")
-            challenge_stats = self.get_statistics_challenge_solves()
-            if challenge_stats:
-                stats["challenge_solves"] = challenge_stats
-
-            # Get team statistics
-            team_stats = self.get_statistics_teams()
-            if team_stats:
-                stats["team_stats"] = team_stats
-
-            # Get challenge solve percentages using the /statistics/challenges endpoint
-            resp = requests.get(
-                f"{self.base_url}/api/v1/statistics/challenges",
-                headers=self.headers,
+            # Each statistics endpoint is requested once, all concurrently
+            logger.debug("Fetching comprehensive statistics")
+            results = await asyncio.gather(
+                self.get_statistics_challenge_solves(),
+                self.get_statistics_teams(),
+                self.get_statistics_challenges(),
+                self.get_statistics_submissions(),
             )
-            if resp.status_code == 200:
-                data = resp.json()
-                if data.get("success"):
-                    stats["challenge_percentages"] = data.get("data", {})
-                    logger.debug("Successfully fetched challenge percentage statistics")
-            else:
-                logger.warning(
-                    f"Challenge percentages endpoint returned {resp.status_code}"
-                )
-
-            # Get submission statistics
-            resp = requests.get(
-                f"{self.base_url}/api/v1/statistics/submissions",
-                headers=self.headers,
+            keys = (
+                "challenge_solves",
+                "team_stats",
+                "challenge_percentages",
+                "submission_stats",
             )
-            if resp.status_code == 200:
-                data = resp.json()
-                if data.get("success"):
-                    stats["submission_stats"] = data.get("data", {})
-                    logger.debug("Successfully fetched submission statistics")
-            else:
-                logger.warning(
-                    f"Submission statistics endpoint returned {resp.status_code}"
-                )
+            stats = {key: value for key, value in zip(keys, results) if value}
 
-            logger.info(
+            logger.debug(
                 f"Fetched comprehensive statistics with {len(stats)} categories"
             )
             return stats
@@ -212,14 +654,11 @@ class CTFdAPI:
             logger.error(f"Error fetching comprehensive statistics: {e}")
             return {}
 
-    def get_statistics_challenges(self):
+    async def get_statistics_challenges(self):
         """Get challenge statistics including solve percentages"""
         try:
             logger.debug("Fetching challenge statistics with percentages")
-            resp = requests.get(
-                f"{self.base_url}/api/v1/statistics/challenges",
-                headers=self.headers,
-            )
+            resp = await self._get("/api/v1/statistics/challenges")
             if resp.status_code == 200:
                 data = resp.json()
                 if data.get("success"):
@@ -231,14 +670,11 @@ class CTFdAPI:
             logger.error(f"Error fetching challenge statistics: {e}")
             return {}
 
-    def get_statistics_submissions(self):
+    async def get_statistics_submissions(self):
         """Get submission statistics"""
         try:
             logger.debug("Fetching submission statistics")
-            resp = requests.get(
-                f"{self.base_url}/api/v1/statistics/submissions",
-                headers=self.headers,
-            )
+            resp = await self._get("/api/v1/statistics/submissions")
             if resp.status_code == 200:
                 data = resp.json()
                 if data.get("success"):
@@ -252,14 +688,11 @@ class CTFdAPI:
             logger.error(f"Error fetching submission statistics: {e}")
             return {}
 
-    def get_statistics_users(self):
+    async def get_statistics_users(self):
         """Get user statistics"""
         try:
             logger.debug("Fetching user statistics")
-            resp = requests.get(
-                f"{self.base_url}/api/v1/statistics/users",
-                headers=self.headers,
-            )
+            resp = await self._get("/api/v1/statistics/users")
             if resp.status_code == 200:
                 data = resp.json()
                 if data.get("success"):
@@ -271,65 +704,180 @@ class CTFdAPI:
             logger.error(f"Error fetching user statistics: {e}")
             return {}
 
-    def get_submissions_with_type(self, submission_type="correct"):
+    async def get_submissions_with_type(self, submission_type="correct"):
         """Get submissions filtered by type using the official submissions endpoint"""
         try:
             logger.debug(f"Fetching submissions with type: {submission_type}")
             params = {"type": submission_type}
-            resp = requests.get(
-                f"{self.base_url}/api/v1/submissions",
-                headers=self.headers,
-                params=params,
+            submissions = await self.get_paginated("/api/v1/submissions", params)
+            logger.debug(
+                f"Fetched {len(submissions)} submissions of type {submission_type}"
             )
-            if resp.status_code == 200:
-                data = resp.json()
-                if data.get("success"):
-                    submissions = data.get("data", [])
-                    logger.debug(
-                        f"Fetched {len(submissions)} submissions of type {submission_type}"
-                    )
-                    return submissions
-            logger.warning(f"Submissions endpoint returned {resp.status_code}")
-            return []
+            return submissions
         except Exception as e:
             logger.error(f"Error fetching submissions: {e}")
             return []
 
-    def get_all_users(self):
+    async def get_submissions_since(self, cursor=None, submission_type="correct"):
+        """Get submissions newer than a cursor, reading only the trailing pages
+
+        The cursor is a dict with the highest submission id seen so far and the
+        total number of matching submissions at that time. CTFd lists
+        submissions in id order, so new submissions are on the last pages.
+        Deleted submissions can leave fewer pages than the cursor expects;
+        reading then restarts from the last page there is.
+        Returns the new submissions and the advanced cursor.
+        """
+        cursor = cursor or {"last_id": 0, "count": 0}
+        last_id = cursor["last_id"]
+        params = {"type": submission_type, "per_page": PAGE_SIZE}
+        # Start on the page holding the last seen submission
+        page = max(cursor["count"] - 1, 0) // PAGE_SIZE + 1
+        try:
+            logger.debug(
+                f"Fetching {submission_type} submissions after id {last_id} from page {page}"
+            )
+            while True:
+                try:
+                    submissions, pagination = await self._get_page(
+                        "/api/v1/submissions", params, page
+                    )
+                except CTFdAPIError as e:
+                    if e.status != 404 or page == 1:
+                        raise
+                    submissions, pagination = [], {}
+                if page > 1 and not submissions:
+                    # Past the last page: CTFd answers 404 or an empty page
+                    if not pagination:
+                        _, pagination = await self._get_page(
+                            "/api/v1/submissions", params, 1
+                        )
+                    last_page = min(pagination.get("pages") or 1, page - 1)
+                    logger.info(
+                        f"Submissions were deleted, re-reading from page {last_page}"
+                    )
+                    page = last_page
+                    continue
+                # Deleted submissions shift rows to earlier pages; step back
+                # until the page overlaps what was already seen
+                if page > 1 and submissions and submissions[0]["id"] > last_id:
+                    page -= 1
+                    continue
+                break
+
+            total = pagination.get("total", cursor["count"])
+            new_submissions = [s for s in submissions if s["id"] > last_id]
+            pages = pagination.get("pages") or page
+            if pages > page:
+                async for submissions in self._iter_remaining_pages(
+                    "/api/v1/submissions", params, range(page + 1, pages + 1)
+                ):
+                    new_submissions.extend(s for s in submissions if s["id"] > last_id)
+
+            if new_submissions:
+                last_id = max(s["id"] for s in new_submissions)
+            logger.debug(
+                f"Fetched {len(new_submissions)} new {submission_type} submissions"
+            )
+            return new_submissions, {"last_id": last_id, "count": total}
+        except Exception as e:
+            logger.error(f"Error fetching new submissions: {e}")
+            return [], cursor
+
+    async def get_all_users(self):
         """Get all users/players"""
         try:
             logger.debug("Fetching all users")
-            resp = requests.get(f"{self.base_url}/api/v1/users", headers=self.headers)
-            resp.raise_for_status()
-            users = resp.json().get("data", [])
+            users = await self.get_paginated("/api/v1/users")
             logger.debug(f"Fetched {len(users)} users")
             return users
         except Exception as e:
             logger.error(f"Error fetching users: {e}")
             return []
 
-    def get_all_teams(self):
+    async def get_all_teams(self):
         """Get all teams"""
         try:
             logger.debug("Fetching all teams")
-            resp = requests.get(f"{self.base_url}/api/v1/teams", headers=self.headers)
-            resp.raise_for_status()
-            teams = resp.json().get("data", [])
+            teams = await self.get_paginated("/api/v1/teams")
             logger.debug(f"Fetched {len(teams)} teams")
             return teams
         except Exception as e:
             logger.error(f"Error fetching teams: {e}")
             return []
 
-    def get_all_submissions(self):
+    async def get_hidden_account_ids(self, accounts="teams", account_ids=()):
+        """Get the ids of hidden or banned teams or users
+
+        CTFd leaves these accounts out of challenge solve lists, but the
+        admin submissions listing still includes them. Needs an admin token.
+        The admin listing is only read again when one of ``account_ids`` was
+        never seen or after HIDDEN_ACCOUNTS_TTL seconds; in between, and when
+        reading fails, the last known set is returned.
+
+        Args:
+            accounts (str): "teams" or "users"
+            account_ids (iterable): Accounts about to be looked up
+
+        Raises:
+            Exception: If the listing was never read successfully, so hidden
+                accounts are not mistaken for visible ones
+        """
+        account_ids = set(account_ids)
+        known, hidden, read_at = self._hidden_accounts.get(accounts, (set(), None, None))
+        if (
+            hidden is not None
+            and time.monotonic() - read_at < HIDDEN_ACCOUNTS_TTL
+            and account_ids <= known
+        ):
+            return hidden
+        try:
+            items = await self.get_paginated(f"/api/v1/{accounts}", {"view": "admin"})
+        except Exception as e:
+            logger.error(f"Error fetching hidden {accounts}: {e}")
+            if hidden is None:
+                raise
+            return hidden
+        hidden = {
+            item["id"] for item in items if item.get("hidden") or item.get("banned")
+        }
+        # Ids missing from the listing count as known too, so they do not
+        # trigger a read on every poll
+        known = {item["id"] for item in items} | account_ids
+        self._hidden_accounts[accounts] = (known, hidden, time.monotonic())
+        return hidden
+
+    async def get_team_count(self):
+        """Get the number of teams without downloading them"""
+        try:
+            return await self.get_count("/api/v1/teams")
+        except Exception as e:
+            logger.error(f"Error counting teams: {e}")
+            return 0
+
+    async def get_user_count(self):
+        """Get the number of users without downloading them"""
+        try:
+            return await self.get_count("/api/v1/users")
+        except Exception as e:
+            logger.error(f"Error counting users: {e}")
+            return 0
+
+    async def get_submission_count(self, submission_type="correct"):
+        """Get the number of submissions of a type without downloading them"""
+        try:
+            return await self.get_count(
+                "/api/v1/submissions", {"type": submission_type}
+            )
+        except Exception as e:
+            logger.error(f"Error counting {submission_type} submissions: {e}")
+            return 0
+
+    async def get_all_submissions(self):
         """Get all submissions/solves"""
         try:
             logger.debug("Fetching all submissions")
-            resp = requests.get(
-                f"{self.base_url}/api/v1/submissions", headers=self.headers
-            )
-            resp.raise_for_status()
-            submissions = resp.json().get("data", [])
+            submissions = await self.get_paginated("/api/v1/submissions")
             logger.debug(f"Fetched {len(submissions)} submissions")
             return submissions
 
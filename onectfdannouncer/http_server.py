@@ -0,0 +1,42 @@
+"""
+Optional HTTP listener running inside the bot process.
+"""
+
+import logging
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPServer:
+    """
+    Small aiohttp server sharing the bot's event loop.
+
+    Features register their routes before start() is called.
+
+    Args:
+        host (str): Interface to bind
+        port (int): TCP port to listen on
+    """
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.app = web.Application()
+        self._runner = None
+
+    def add_route(self, method, path, handler):
+        self.app.router.add_route(method, path, handler)
+
+    async def start(self):
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        logger.info(f"HTTP server listening on {self.host}:{self.port}")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+            logger.debug("HTTP server stopped")
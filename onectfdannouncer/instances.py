@@ -0,0 +1,114 @@
+"""
+Registry of the CTFd instances served by one bot process.
+"""
+
+import asyncio
+import logging
+from .config import (
+    CTFD_URL,
+    CTFD_API_KEY,
+    ANNOUNCE_CHANNEL_ID,
+    CTFD_INSTANCES,
+)
+from .ctfd_api import CTFdAPI
+from .snapshot import build_snapshot
+from .state_db import AsyncStateDB, DEFAULT_NAMESPACE
+
+logger = logging.getLogger(__name__)
+
+
+class CTFdInstance:
+    """
+    One CTFd event: its API client, state namespace and default channel.
+
+    The poll loop, snapshot refresher, solve event handler, announcement
+    queue and router are attached by register_tasks.
+
+    Args:
+        name (str): Instance name, also its StateDB namespace
+        url (str): CTFd base URL
+        api_key (str): CTFd API token
+        channel_id (int): Channel used when no announcement route matches
+    """
+
+    def __init__(self, name, url, api_key, channel_id):
+        self.name = name
+        self.channel_id = channel_id
+        self.ctfd = CTFdAPI(url, api_key)
+        self.db = AsyncStateDB(namespace=name)
+        self.poll_first_bloods = None
+        self.refresh_snapshots = None
+        self.snapshot = None  # latest ScoreboardSnapshot
+        self._refreshing = None
+        self.handle_solve_event = None
+        self.queue = None
+        self.router = None
+
+    async def refresh_snapshot(self):
+        """
+        Rebuild the scoreboard snapshot, sharing a refresh already running.
+
+        On failure the previous snapshot is kept and returned.
+
+        Returns:
+            ScoreboardSnapshot: The latest snapshot, or None if none was ever built
+        """
+        if self._refreshing is None:
+            self._refreshing = asyncio.create_task(self._refresh_snapshot())
+        try:
+            await asyncio.shield(self._refreshing)
+        finally:
+            if self._refreshing is not None and self._refreshing.done():
+                self._refreshing = None
+        return self.snapshot
+
+    async def _refresh_snapshot(self):
+        try:
+            self.snapshot = await build_snapshot(self.ctfd, self.db)
+            logger.debug(f"Refreshed scoreboard snapshot [{self.name}]")
+        except Exception as e:
+            logger.error(f"Error refreshing scoreboard snapshot [{self.name}]: {e}")
+
+    async def close(self):
+        if self.queue is not None:
+            await self.queue.close()
+        await self.ctfd.close()
+        await self.db.close()
+
+
+class InstanceRegistry:
+    """CTFd instances by name, the first one being the default"""
+
+    def __init__(self, instances):
+        self._instances = {instance.name: instance for instance in instances}
+        self.default = instances[0]
+
+    def __iter__(self):
+        return iter(self._instances.values())
+
+    def __len__(self):
+        return len(self._instances)
+
+    def names(self):
+        return list(self._instances)
+
+    def get(self, name=None):
+        """Return the named instance, the default one for no name, else None"""
+        if not name:
+            return self.default
+        return self._instances.get(name)
+
+
+def load_instances():
+    """Build the registry from the environment configuration"""
+    instances = [
+        CTFdInstance(DEFAULT_NAMESPACE, CTFD_URL, CTFD_API_KEY, ANNOUNCE_CHANNEL_ID)
+    ]
+    for extra in CTFD_INSTANCES:
+        instances.append(
+            CTFdInstance(
+                extra["name"], extra["url"], extra["api_key"], extra["channel_id"]
+            )
+        )
+    logger.info(f"Serving {len(instances)} CTFd instance(s)")
+    return InstanceRegistry(instances)
@@ -0,0 +1,315 @@
+"""
+Lightweight Prometheus-style metrics and the /metrics endpoint.
+"""
+
+import logging
+import re
+import time
+from bisect import bisect_left
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+METRICS_PATH = "/metrics"
+
+# Seconds; suits HTTP requests, Discord sends and SQLite operations
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{escape_label(value)}"' for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+class Registry:
+    """Metrics rendered together in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def unregister(self, name):
+        self._metrics.pop(name, None)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class Counter:
+    """
+    Monotonic counter with optional labels.
+
+    Args:
+        name (str): Metric name
+        help (str): Description shown in the exposition
+        labelnames (tuple): Label names, passed in this order to inc()
+    """
+
+    type = "counter"
+
+    def __init__(self, name, help, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        registry.register(self)
+
+    def inc(self, *labelvalues, amount=1):
+        self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def samples(self):
+        for labelvalues, value in self._values.items():
+            yield f"{self.name}{format_labels(self.labelnames, labelvalues)} {value}"
+
+
+class Histogram:
+    """
+    Histogram of observed values with fixed upper bounds.
+
+    Observing is a bisect and three additions, cheap enough for hot paths.
+
+    Args:
+        name (str): Metric name
+        help (str): Description shown in the exposition
+        labelnames (tuple): Label names, passed in this order to observe()
+        buckets (tuple): Sorted bucket upper bounds; +Inf is implied
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts, sum, count]
+        registry.register(self)
+
+    def observe(self, value, *labelvalues):
+        series = self._series.get(labelvalues)
+        if series is None:
+            series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def time(self, *labelvalues):
+        """Context manager observing the duration of its block"""
+        return _Timer(self, labelvalues)
+
+    def samples(self):
+        for labelvalues, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                labels = format_labels(
+                    self.labelnames + ("le",), labelvalues + (bound,)
+                )
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = format_labels(self.labelnames, labelvalues)
+            yield f"{self.name}_sum{labels} {total}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+class _Timer:
+    __slots__ = ("histogram", "labelvalues", "start")
+
+    def __init__(self, histogram, labelvalues):
+        self.histogram = histogram
+        self.labelvalues = labelvalues
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labelvalues)
+
+
+class CallbackMetric:
+    """
+    Gauge or counter whose samples are read from a function at scrape time.
+
+    Args:
+        name (str): Metric name
+        help (str): Description shown in the exposition
+        type (str): "gauge" or "counter"
+        labelnames (tuple): Label names
+        collect: Function returning (label values tuple, value) pairs
+    """
+
+    def __init__(self, name, help, type, labelnames, collect, registry=REGISTRY):
+        self.name = name
+        self.help = help
+        self.type = type
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+        registry.register(self)
+
+    def samples(self):
+        for labelvalues, value in self.collect():
+            yield f"{self.name}{format_labels(self.labelnames, labelvalues)} {value}"
+
+
+# Hot-path instrumentation
+
+CTFD_REQUEST_SECONDS = Histogram(
+    "ctfd_request_duration_seconds",
+    "CTFd API request latency by endpoint",
+    ("endpoint",),
+)
+CTFD_REQUESTS = Counter(
+    "ctfd_requests_total",
+    "CTFd API requests by endpoint and status",
+    ("endpoint", "status"),
+)
+POLL_SECONDS = Histogram(
+    "poll_duration_seconds",
+    "Duration of one first blood poll cycle",
+    ("instance",),
+)
+SOLVE_TO_ANNOUNCEMENT_SECONDS = Histogram(
+    "solve_to_announcement_seconds",
+    "Time from a first solve in CTFd to Discord accepting its announcement",
+    ("instance",),
+    buckets=(1, 2, 5, 10, 15, 30, 60, 120, 300, 600, 1800),
+)
+DISCORD_SEND_SECONDS = Histogram(
+    "discord_send_duration_seconds", "Latency of one Discord message send"
+)
+SQLITE_OPERATION_SECONDS = Histogram(
+    "sqlite_operation_duration_seconds",
+    "StateDB operation latency, including the wait for the writer thread",
+    ("operation",),
+)
+EVENT_LOOP_LAG_SECONDS = Histogram(
+    "event_loop_lag_seconds",
+    "How late the event loop ran a timer scheduled for a fixed delay",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+def endpoint_label(path):
+    """Collapse numeric path segments so each endpoint is one label value"""
+    return _ID_SEGMENT.sub("/{id}", path)
+
+
+def register_instance_metrics(instances):
+    """Expose the cache, conditional GET and queue counters of CTFd instances"""
+    CallbackMetric(
+        "ctfd_cache_events_total",
+        "CTFd response cache lookups by result",
+        "counter",
+        ("instance", "result"),
+        lambda: [
+            ((instance.name, result), value)
+            for instance in instances
+            for result, value in instance.ctfd.cache.stats.items()
+        ],
+    )
+    CallbackMetric(
+        "ctfd_conditional_requests_total",
+        "Conditional CTFd requests by whether the previous payload was reused",
+        "counter",
+        ("instance", "result"),
+        lambda: [
+            ((instance.name, result), value)
+            for instance in instances
+            for result, value in instance.ctfd.conditional_stats.items()
+        ],
+    )
+    CallbackMetric(
+        "ctfd_circuit_state",
+        "CTFd circuit breaker state: 0 closed, 1 half-open, 2 open",
+        "gauge",
+        ("instance",),
+        lambda: [
+            ((instance.name,), CIRCUIT_STATES[instance.ctfd.breaker.state])
+            for instance in instances
+        ],
+    )
+    CallbackMetric(
+        "ctfd_resilience_events_total",
+        "CTFd retries, exhausted retry budgets, short-circuited and rate limited requests",
+        "counter",
+        ("instance", "event"),
+        lambda: [
+            ((instance.name, event), value)
+            for instance in instances
+            for event, value in instance.ctfd.resilience_stats.items()
+        ],
+    )
+    CallbackMetric(
+        "ctfd_rate_limiter_requests_total",
+        "Requests through the client-side rate limiter by how they got a token",
+        "counter",
+        ("instance", "result"),
+        lambda: [
+            ((instance.name, result), value)
+            for instance in instances
+            if instance.ctfd.limiter is not None
+            for result, value in instance.ctfd.limiter.stats.items()
+        ],
+    )
+    CallbackMetric(
+        "ctfd_rate_limiter_waiting",
+        "Requests queued for the client-side rate limiter",
+        "gauge",
+        ("instance",),
+        lambda: [
+            ((instance.name,), len(instance.ctfd.limiter))
+            for instance in instances
+            if instance.ctfd.limiter is not None
+        ],
+    )
+    CallbackMetric(
+        "announcements_pending",
+        "Announcements queued or being sent",
+        "gauge",
+        ("instance",),
+        lambda: [
+            ((instance.name,), len(instance.queue))
+            for instance in instances
+            if instance.queue is not None
+        ],
+    )
+
+
+def register_metrics(server, registry=REGISTRY):
+    """Serve the registry in the Prometheus text format on an HTTPServer"""
+
+    async def metrics(request):
+        return web.Response(
+            body=registry.render().encode(),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+        )
+
+    server.add_route("GET", METRICS_PATH, metrics)
+    logger.info(f"Metrics enabled on {METRICS_PATH}")
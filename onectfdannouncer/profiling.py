@@ -0,0 +1,86 @@
+"""
+Opt-in cProfile capture of slash commands and poll cycles.
+"""
+
+import cProfile
+import functools
+import logging
+import os
+import time
+from contextlib import contextmanager
+from .config import PROFILE_DIR, PROFILE_KEEP
+
+logger = logging.getLogger(__name__)
+
+# cProfile can only have one profiler enabled per thread
+_active = False
+
+
+def rotate(directory, keep):
+    """Delete all but the newest ``keep`` profiles in directory"""
+    profiles = sorted(
+        (entry for entry in os.scandir(directory) if entry.name.endswith(".prof")),
+        key=lambda entry: entry.stat().st_mtime,
+    )
+    for entry in profiles[: max(len(profiles) - keep, 0)]:
+        try:
+            os.remove(entry.path)
+        except OSError as e:
+            logger.warning(f"Could not remove old profile {entry.path}: {e}")
+
+
+@contextmanager
+def profile(name, directory=PROFILE_DIR, keep=PROFILE_KEEP):
+    """
+    Profile the enclosed block into ``<directory>/<time>-<ms>-<name>.prof``.
+
+    Does nothing unless PROFILE_DIR is set. The profiler sees everything the
+    event loop thread runs meanwhile, so a block that awaits also records
+    other tasks. While one block is being profiled, others run unprofiled.
+    Open the files with ``python -m pstats`` or snakeviz.
+
+    Args:
+        name (str): Label of the profiled block, used in the file name
+        directory (str): Directory receiving the profiles
+        keep (int): Number of profiles kept before the oldest are deleted
+    """
+    global _active
+    if not directory or _active:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    _active = True
+    start = time.perf_counter()
+    try:
+        profiler.enable()
+        yield
+    finally:
+        profiler.disable()
+        _active = False
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        try:
+            os.makedirs(directory, exist_ok=True)
+            timestamp = time.strftime("%Y%m%d-%H%M%S")
+            path = os.path.join(
+                directory, f"{timestamp}-{elapsed_ms:.0f}ms-{name}.prof"
+            )
+            profiler.dump_stats(path)
+            rotate(directory, keep)
+            logger.debug(f"Saved profile of {name} to {path}")
+        except OSError as e:
+            logger.warning(f"Could not save profile of {name}: {e}")
+
+
+def profiled(name):
+    """Decorate a coroutine function so every call is profiled as name"""
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with profile(name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,139 @@
+"""
+Client-side token bucket shared by every caller of one CTFd instance.
+"""
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import logging
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Priority classes, most urgent first
+POLL = 0  # first blood detection and pushed solve events
+BACKGROUND = 1  # snapshot refreshes and anything without a class
+INTERACTIVE = 2  # requests made on behalf of a slash command
+
+PRIORITY_NAMES = {POLL: "poll", BACKGROUND: "background", INTERACTIVE: "interactive"}
+
+_priority = contextvars.ContextVar("ctfd_request_priority", default=BACKGROUND)
+
+
+def current_priority():
+    """Priority class of CTFd requests made from the current context"""
+    return _priority.get()
+
+
+@contextmanager
+def request_priority(priority):
+    """
+    Make CTFd requests in this block, and tasks started from it, use a priority.
+
+    Args:
+        priority (int): POLL, BACKGROUND or INTERACTIVE
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class RateLimiter:
+    """
+    Token bucket that serves waiting requests by priority.
+
+    Tokens refill at ``rate`` per second up to ``burst``. A request takes
+    ``weight`` tokens right away if nobody is waiting, otherwise it queues;
+    the queue is ordered by priority class and then by arrival, so a first
+    blood poll overtakes queued snapshot and command requests. A request
+    with a ``max_wait`` gives up instead of queueing longer, so its caller
+    can fall back to cached data.
+
+    Args:
+        rate (float): Tokens added per second
+        burst (float): Bucket size, defaults to one second of tokens
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(rate, 1)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._waiters = []  # heap of (priority, arrival, weight, future)
+        self._arrivals = itertools.count()
+        self._dispatcher = None
+        self.stats = {"immediate": 0, "waited": 0, "rejected": 0}
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def __len__(self):
+        return sum(1 for *_, future in self._waiters if not future.done())
+
+    async def acquire(self, weight=1, priority=BACKGROUND, max_wait=None):
+        """
+        Take tokens for one request, waiting for more urgent requests first.
+
+        Args:
+            weight (float): Tokens the request costs
+            priority (int): Priority class, lower is served first
+            max_wait (float): Seconds to wait at most, None for no limit
+
+        Returns:
+            bool: True once the tokens were taken, False if the request
+                would have waited longer than max_wait
+        """
+        weight = min(weight, self.burst)
+        self._refill()
+        if not self._waiters and self.tokens >= weight:
+            self.tokens -= weight
+            self.stats["immediate"] += 1
+            return True
+
+        if max_wait is not None:
+            # Requests at least as urgent are served before this one
+            ahead = sum(
+                w for p, _, w, future in self._waiters if p <= priority and not future.done()
+            )
+            if (ahead + weight - self.tokens) / self.rate > max_wait:
+                self.stats["rejected"] += 1
+                return False
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._arrivals), weight, future))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        try:
+            await asyncio.wait_for(asyncio.shield(future), max_wait)
+        except asyncio.TimeoutError:
+            if not future.done():
+                future.cancel()
+                self.stats["rejected"] += 1
+                return False
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        self.stats["waited"] += 1
+        return True
+
+    async def _dispatch(self):
+        """Hand out tokens to queued requests in priority order as they refill"""
+        while self._waiters:
+            _, _, weight, future = self._waiters[0]
+            if future.done():  # gave up or was cancelled
+                heapq.heappop(self._waiters)
+                continue
+            self._refill()
+            if self.tokens >= weight:
+                heapq.heappop(self._waiters)
+                self.tokens -= weight
+                future.set_result(None)
+                continue
+            # A more urgent request arriving meanwhile is the next head
+            await asyncio.sleep((weight - self.tokens) / self.rate)
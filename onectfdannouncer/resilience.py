@@ -0,0 +1,118 @@
+"""
+Circuit breaker and retry budget protecting CTFd during outages.
+"""
+
+import logging
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing server until it had time to recover.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    calls are refused for ``reset_timeout`` seconds. It then half-opens and
+    lets a single trial call through: success closes it, failure opens it
+    again. Every allowed call must end in record_success, record_failure or
+    release, or the breaker stays half-open with its trial in flight.
+
+    Args:
+        name (str): Name used in log messages
+        failure_threshold (int): Consecutive failures that open the breaker
+        reset_timeout (float): Seconds the breaker stays open
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    def allow(self):
+        """Return whether a call may go out now"""
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = HALF_OPEN
+            logger.info(f"Circuit for {self.name} half-open, trying one request")
+        if self.state == HALF_OPEN:
+            if self._trial_running:
+                return False
+            self._trial_running = True
+        return True
+
+    def record_success(self):
+        if self.state != CLOSED:
+            logger.info(f"Circuit for {self.name} closed, server recovered")
+        self.state = CLOSED
+        self.failures = 0
+        self._trial_running = False
+
+    def release(self):
+        """Give up an allowed call without a verdict, e.g. when cancelled"""
+        self._trial_running = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_running = False
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                logger.warning(
+                    f"Circuit for {self.name} open after {self.failures} failures, "
+                    f"pausing requests for {self.reset_timeout}s"
+                )
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    @property
+    def open_for(self):
+        """Seconds since the breaker last opened, or None while closed"""
+        if self.state == CLOSED or self.opened_at is None:
+            return None
+        return time.monotonic() - self.opened_at
+
+
+class RetryBudget:
+    """
+    Caps retries at a fraction of the regular request volume.
+
+    Every first attempt deposits ``ratio`` tokens and every retry spends
+    one, so during an outage retries add at most ``ratio`` times the normal
+    load instead of multiplying it. ``min_tokens`` allows a few retries
+    while traffic is low.
+
+    Args:
+        ratio (float): Retries allowed per request
+        min_tokens (float): Tokens available at startup
+        max_tokens (float): Cap on saved up tokens
+    """
+
+    def __init__(self, ratio=0.2, min_tokens=10, max_tokens=100):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = min(min_tokens, max_tokens)
+
+    def deposit(self):
+        self.tokens = min(self.tokens + self.ratio, self.max_tokens)
+
+    def withdraw(self):
+        """Spend one token for a retry; False if the budget is exhausted"""
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+def backoff_delay(attempt, base=0.5, cap=10.0):
+    """Full-jitter exponential backoff for the given retry attempt (0-based)"""
+    return random.uniform(0, min(cap, base * 2**attempt))
@@ -0,0 +1,62 @@
+"""
+Adaptive poll interval for the first blood poller.
+"""
+
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptivePollInterval:
+    """
+    Poll interval that tightens on activity and backs off when idle.
+
+    Any poll that sees new solves resets the interval to ``min_interval``.
+    Every idle poll multiplies it by ``backoff`` up to ``max_interval``.
+    The CTF window narrows this further: before the start the poller sleeps
+    until the start (bounded by ``max_interval``), and after the end it
+    polls at ``max_interval`` only.
+
+    Args:
+        min_interval (float): Shortest interval in seconds
+        max_interval (float): Longest interval in seconds
+        initial (float): Interval used until the first poll completes
+        backoff (float): Multiplier applied after each idle poll
+    """
+
+    def __init__(self, min_interval, max_interval, initial=None, backoff=2.0):
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.backoff = backoff
+        self.current = self._clamp(initial if initial is not None else min_interval)
+
+    def _clamp(self, seconds):
+        return min(max(seconds, self.min_interval), self.max_interval)
+
+    def record_poll(self, activity):
+        """Update the interval after a poll that did or did not see new solves"""
+        if activity:
+            self.current = self.min_interval
+        else:
+            self.current = self._clamp(self.current * self.backoff)
+        return self.current
+
+    def next_interval(self, start=None, end=None, now=None):
+        """
+        Return the seconds to wait before the next poll.
+
+        Args:
+            start (float): CTF start as a Unix timestamp, if known
+            end (float): CTF end as a Unix timestamp, if known
+            now (float): Current Unix time, defaults to time.time()
+
+        Returns:
+            float: The interval in seconds
+        """
+        now = time.time() if now is None else now
+        if start is not None and now < start:
+            return self._clamp(start - now)
+        if end is not None and now > end:
+            return self.max_interval
+        return self.current
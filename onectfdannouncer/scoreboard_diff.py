@@ -0,0 +1,116 @@
+"""
+Rank change detection between consecutive scoreboard snapshots.
+"""
+
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Kinds of rank change
+LEAD = "lead"  # took #1
+TOP = "top"  # entered the top N
+CLIMB = "climb"  # moved up at least min_jump places within the top N
+
+
+class RankChange:
+    """One account's move on the scoreboard worth announcing"""
+
+    __slots__ = ("kind", "account_id", "name", "rank", "previous_rank", "displaced")
+
+    def __init__(self, kind, account_id, name, rank, previous_rank, displaced=None):
+        self.kind = kind
+        self.account_id = account_id
+        self.name = name
+        self.rank = rank
+        self.previous_rank = previous_rank  # None if it was not ranked
+        self.displaced = displaced  # name of the previous leader, for LEAD
+
+    @property
+    def key(self):
+        return (self.kind, self.account_id, self.rank)
+
+
+class ScoreboardDiff:
+    """
+    Finds meaningful rank changes between consecutive scoreboards.
+
+    Ranks are keyed by account id, so renames and ties do not show up as
+    moves. Each update builds one id -> rank dict and only looks at the top
+    ``top`` entries, so it is O(n) in the number of accounts. The first
+    scoreboard is the baseline and yields nothing. An account gets the same
+    kind of announcement at most once per ``cooldown`` seconds, so two teams
+    trading places do not flood the channel, and at most ``max_events``
+    changes come out of one update.
+
+    Args:
+        top (int): Size of the top that entering and climbing refer to
+        min_jump (int): Places an account must climb within the top to be
+            announced; 0 only announces the lead and entering the top
+        cooldown (float): Seconds before the same account and kind repeat
+        max_events (int): Changes reported per update at most
+    """
+
+    def __init__(self, top=10, min_jump=0, cooldown=300, max_events=5):
+        self.top = top
+        self.min_jump = min_jump
+        self.cooldown = cooldown
+        self.max_events = max_events
+        self._ranks = None  # account id -> rank of the previous scoreboard
+        self._leader = None  # name of the previous #1
+        self._announced = {}  # (kind, account id) -> monotonic time
+
+    def update(self, standings):
+        """
+        Compare a scoreboard with the previous one.
+
+        Args:
+            standings (list): Ranked (account id, name, score) tuples
+
+        Returns:
+            list: RankChanges, best rank first
+        """
+        ranks = {account_id: rank for rank, (account_id, _, _) in enumerate(standings, 1)}
+        previous, self._ranks = self._ranks, ranks
+        leader, self._leader = self._leader, (standings[0][1] if standings else None)
+        if previous is None:
+            return []
+
+        changes = []
+        for rank, (account_id, name, score) in enumerate(standings[: self.top], 1):
+            before = previous.get(account_id)
+            # Nothing moved up, and a scoreless order is arbitrary
+            if (before is not None and before <= rank) or not score:
+                continue
+            if rank == 1:
+                change = RankChange(LEAD, account_id, name, rank, before, leader)
+            elif before is None or before > self.top:
+                change = RankChange(TOP, account_id, name, rank, before)
+            elif self.min_jump and before - rank >= self.min_jump:
+                change = RankChange(CLIMB, account_id, name, rank, before)
+            else:
+                continue
+            changes.append(change)
+        return self._debounce(changes)
+
+    def _debounce(self, changes):
+        now = time.monotonic()
+        allowed = []
+        for change in changes:
+            key = (change.kind, change.account_id)
+            last = self._announced.get(key)
+            if last is not None and now - last < self.cooldown:
+                continue
+            if len(allowed) >= self.max_events:
+                logger.debug(f"Dropping rank change of {change.name}: too many at once")
+                continue
+            self._announced[key] = now
+            allowed.append(change)
+        # Forget expired cooldowns so the dict stays small
+        if len(self._announced) > 4 * max(self.top, 1):
+            self._announced = {
+                key: last
+                for key, last in self._announced.items()
+                if now - last < self.cooldown
+            }
+        return allowed
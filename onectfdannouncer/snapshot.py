@@ -0,0 +1,154 @@
+"""
+Precomputed scoreboard snapshot that slash commands render from.
+"""
+
+import asyncio
+import logging
+import time
+from .utils import config_to_dict
+
+logger = logging.getLogger(__name__)
+
+
+def challenge_solve_counts(challenges, challenge_stats):
+    """Map challenge ids to solve counts from the listing or statistics"""
+    counts = {}
+    if isinstance(challenge_stats, list):
+        for item in challenge_stats:
+            if isinstance(item, dict) and "id" in item and "solves" in item:
+                counts[item["id"]] = item["solves"]
+    for chal in challenges:
+        # Newer CTFd versions include the solve count in the listing
+        if chal.get("solves") is not None:
+            counts.setdefault(chal["id"], chal["solves"])
+    return counts
+
+
+class ScoreboardSnapshot:
+    """
+    Compact view of a CTFd instance at one point in time.
+
+    Args:
+        teams (list): Ranked (name, score) tuples
+        account_ids (list): Account ids in the same order as teams
+        team_count (int): Registered teams
+        user_count (int): Registered users
+        challenge_count (int): Visible challenges
+        solve_counts (dict): Challenge id -> number of solves
+        correct_count (int): Correct submissions
+        config (dict): CTF config values keyed by name
+        statistics (dict): Result of get_comprehensive_statistics
+        taken_at (float): Unix time the data was fetched
+    """
+
+    __slots__ = (
+        "teams",
+        "account_ids",
+        "team_count",
+        "user_count",
+        "challenge_count",
+        "solve_counts",
+        "correct_count",
+        "config",
+        "statistics",
+        "taken_at",
+    )
+
+    def __init__(
+        self,
+        teams,
+        account_ids,
+        team_count,
+        user_count,
+        challenge_count,
+        solve_counts,
+        correct_count,
+        config,
+        statistics,
+        taken_at=None,
+    ):
+        self.teams = teams
+        self.account_ids = account_ids
+        self.team_count = team_count
+        self.user_count = user_count
+        self.challenge_count = challenge_count
+        self.solve_counts = solve_counts
+        self.correct_count = correct_count
+        self.config = config
+        self.statistics = statistics
+        self.taken_at = time.time() if taken_at is None else taken_at
+
+    @property
+    def age(self):
+        """Seconds since the data was fetched"""
+        return max(time.time() - self.taken_at, 0.0)
+
+    def top(self, limit=10):
+        return self.teams[:limit]
+
+    def standings(self):
+        """Ranked (account id, name, score) tuples"""
+        return [
+            (account_id, name, score)
+            for account_id, (name, score) in zip(self.account_ids, self.teams)
+        ]
+
+
+async def build_snapshot(ctfd, db=None):
+    """
+    Fetch everything /top10 and /stats show and condense it into a snapshot.
+
+    The fetch is planned so every endpoint is requested once, concurrently.
+    Teams, users and correct submissions are only counted, from the
+    pagination total of a one-item page. The scoreboard and challenge
+    listing are required and raise on failure; the other parts fall back to
+    empty values like their CTFdAPI methods do.
+
+    The challenges and scoreboard also update the local mirror when a
+    database is given; a failing mirror write does not fail the snapshot.
+
+    Args:
+        ctfd (CTFdAPI): Client of the instance
+        db (AsyncStateDB): Database holding the instance's mirror, optional
+
+    Returns:
+        ScoreboardSnapshot: The new snapshot
+    """
+    (
+        scoreboard,
+        challenges,
+        team_count,
+        user_count,
+        correct_count,
+        config,
+        statistics,
+    ) = await asyncio.gather(
+        ctfd.get_top_teams(limit=None),
+        ctfd.get_challenges(),
+        ctfd.get_team_count(),
+        ctfd.get_user_count(),
+        ctfd.get_submission_count("correct"),
+        ctfd.get_ctf_config(),
+        ctfd.get_comprehensive_statistics(),
+    )
+
+    if db is not None:
+        try:
+            await db.sync_challenges(challenges)
+            await db.sync_teams(scoreboard)
+        except Exception as e:
+            logger.error(f"Error updating the local CTFd mirror: {e}")
+
+    return ScoreboardSnapshot(
+        teams=[(team.get("name"), team.get("score", 0)) for team in scoreboard],
+        account_ids=[team.get("account_id", team.get("name")) for team in scoreboard],
+        team_count=team_count,
+        user_count=user_count,
+        challenge_count=len(challenges),
+        solve_counts=challenge_solve_counts(
+            challenges, statistics.get("challenge_solves")
+        ),
+        correct_count=correct_count,
+        config=config_to_dict(config),
+        statistics=statistics,
+    )
@@ -0,0 +1,55 @@
+"""
+Solve order index built once per poll and read by every blood kind.
+"""
+
+from .utils import parse_ctf_time
+
+
+class SolveIndex:
+    """
+    Earliest solvers per challenge and earliest solve per category.
+
+    The poller fills it from whatever it fetched this cycle. First, second
+    and third bloods and the first solve of each category are all read from
+    it, so an extra kind of announcement costs no extra request.
+
+    Args:
+        ranks (int): Solvers kept per challenge
+    """
+
+    def __init__(self, ranks=3):
+        self.ranks = ranks
+        self.solvers = {}  # challenge id -> (challenge, earliest solves in order)
+        self.category_firsts = {}  # category -> (challenge, solve, Unix time)
+
+    def __bool__(self):
+        return bool(self.solvers)
+
+    def add(self, chal, solves):
+        """
+        Index the solves of one challenge.
+
+        Args:
+            chal (dict): Challenge with at least id, name and category
+            solves (list): Solves shaped like /api/v1/challenges/<id>/solves
+                entries, oldest first
+        """
+        solves = solves[: self.ranks]
+        if not solves:
+            return
+        self.solvers[chal["id"]] = (chal, solves)
+        category = chal.get("category")
+        if not category:
+            return
+        solved_at = parse_ctf_time(solves[0].get("date"))
+        current = self.category_firsts.get(category)
+        if current is None or (
+            solved_at is not None and (current[2] is None or solved_at < current[2])
+        ):
+            self.category_firsts[category] = (chal, solves[0], solved_at)
+
+    def bloods(self):
+        """Yield (challenge, solve, rank) for every indexed solver"""
+        for chal, solves in self.solvers.values():
+            for rank, solve in enumerate(solves, 1):
+                yield chal, solve, rank
@@ -1,42 +1,664 @@
+import asyncio
+import json
 import logging
 import sqlite3
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .metrics import SQLITE_OPERATION_SECONDS
+from .utils import parse_ctf_time
 
 logger = logging.getLogger(__name__)
 # Use environment variable for DB path, with fallback to local path
 DB_PATH = os.environ.get("DB_PATH", "state.db")
+# Pending announced marks written in one transaction
+DB_BATCH_SIZE = int(os.environ.get("DB_BATCH_SIZE", "50"))
+
+
+# Namespace of the single-instance setup and of pre-namespace databases
+DEFAULT_NAMESPACE = "default"
+# Bumped whenever an existing table changes shape
+SCHEMA_VERSION = 3
+# Tables that gained a namespace column in schema version 1. In version 2
+# announced_first_bloods was replaced by announced_bloods, which has a rank.
+NAMESPACED_TABLES = {
+    "announced_first_bloods": "challenge_id",
+    "announcement_routes": "event_type, category, channel_id",
+    "cursors": "name, value",
+}
 
 
 class StateDB:
-    def __init__(self, db_path=DB_PATH):
+    """
+    SQLite-backed bot state for one namespace (one CTFd instance).
+
+    Besides the announcement state it keeps a local mirror of the CTFd
+    challenges, teams and correct solves, fed by what the poller and the
+    snapshot refresher already fetch, so stats queries never go to CTFd.
+
+    Several StateDB objects with different namespaces can share a file.
+    """
+
+    def __init__(self, db_path=DB_PATH, batch_size=DB_BATCH_SIZE, namespace=DEFAULT_NAMESPACE):
         self.conn = sqlite3.connect(db_path)
+        self.batch_size = batch_size
+        self.namespace = namespace
+        self.configure_connection()
         self.create_table()
-        logger.info(f"StateDB initialized with database at {db_path}")
+        # Announced ids are answered from memory and written behind in batches.
+        # AsyncStateDB reads the in-memory sets on the event loop while the
+        # writer thread changes them, so both sides hold this lock.
+        self._lock = threading.Lock()
+        self._announced = self.load_announced()  # (challenge id, rank) pairs
+        self._categories = self.load_announced_categories()
+        self._pending = []
+        self._pending_categories = []
+        self._routes = self.load_routes()
+        # Last mirrored row per id, so unchanged rows are not written again
+        self._challenges = self.load_mirror(
+            "challenges", "challenge_id", "name, category, value, listed_solves, hidden"
+        )
+        self._teams = self.load_mirror("teams", "account_id", "name, score")
+        logger.info(
+            f"StateDB initialized with database at {db_path} for namespace "
+            f"{namespace} ({len(self._announced)} announced bloods)"
+        )
+
+    def configure_connection(self):
+        # WAL lets readers proceed during writes, and NORMAL sync only
+        # fsyncs at checkpoints, which is safe in WAL mode
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        self.conn.execute("PRAGMA cache_size=-8000")  # KiB
+        self.conn.execute("PRAGMA busy_timeout=5000")  # ms
+
+    def _columns(self, table):
+        return [row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")]
+
+    def rename_legacy_tables(self):
+        """Move tables from before namespaces aside, returning their names"""
+        for table in NAMESPACED_TABLES:
+            columns = self._columns(table)
+            if columns and "namespace" not in columns:
+                self.conn.execute(f"ALTER TABLE {table} RENAME TO {table}_v0")
+                logger.info(f"Migrating table {table} to namespaced schema")
+        return [table for table in NAMESPACED_TABLES if self._columns(f"{table}_v0")]
 
     def create_table(self):
+        legacy_tables = self.rename_legacy_tables()
         with self.conn:
+            # Rank 1 is the first blood, 2 the second blood and so on
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS announced_bloods (
+                    namespace TEXT NOT NULL,
+                    challenge_id INTEGER NOT NULL,
+                    rank INTEGER NOT NULL,
+                    PRIMARY KEY (namespace, challenge_id, rank)
+                )
+            """
+            )
+            # Categories whose first solve already happened
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS announced_categories (
+                    namespace TEXT NOT NULL,
+                    category TEXT NOT NULL,
+                    PRIMARY KEY (namespace, category)
+                )
+            """
+            )
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS announcement_routes (
+                    namespace TEXT NOT NULL,
+                    event_type TEXT NOT NULL,
+                    category TEXT NOT NULL DEFAULT '*',
+                    channel_id INTEGER NOT NULL,
+                    PRIMARY KEY (namespace, event_type, category, channel_id)
+                )
+            """
+            )
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cursors (
+                    namespace TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    PRIMARY KEY (namespace, name)
+                )
+            """
+            )
+            # Local mirror of CTFd; solve_count is the listing's count, raised
+            # to the number of mirrored solves where the listing lacks it.
+            # Challenges that left the listing are kept as hidden.
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS challenges (
+                    namespace TEXT NOT NULL,
+                    challenge_id INTEGER NOT NULL,
+                    name TEXT,
+                    category TEXT,
+                    value INTEGER,
+                    listed_solves INTEGER,
+                    solve_count INTEGER NOT NULL DEFAULT 0,
+                    hidden INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (namespace, challenge_id)
+                )
+            """
+            )
+            if "hidden" not in self._columns("challenges"):
+                logger.info("Migrating challenges mirror to keep hidden challenges")
+                self.conn.execute(
+                    "ALTER TABLE challenges ADD COLUMN hidden INTEGER NOT NULL DEFAULT 0"
+                )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS challenges_category ON challenges (namespace, category)"
+            )
             self.conn.execute(
                 """
-                CREATE TABLE IF NOT EXISTS announced_first_bloods (
-                    challenge_id INTEGER PRIMARY KEY
+                CREATE TABLE IF NOT EXISTS teams (
+                    namespace TEXT NOT NULL,
+                    account_id INTEGER NOT NULL,
+                    name TEXT,
+                    score INTEGER,
+                    PRIMARY KEY (namespace, account_id)
                 )
             """
             )
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS solves (
+                    namespace TEXT NOT NULL,
+                    challenge_id INTEGER NOT NULL,
+                    account_id INTEGER NOT NULL,
+                    account_name TEXT,
+                    solved_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, challenge_id, account_id)
+                )
+            """
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS solves_challenge ON solves (namespace, challenge_id, solved_at)"
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS solves_account ON solves (namespace, account_id)"
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS solves_time ON solves (namespace, solved_at)"
+            )
+            # Rows from before namespaces belong to the default instance
+            for table in legacy_tables:
+                columns = NAMESPACED_TABLES[table]
+                if table == "announced_first_bloods":
+                    self.copy_first_bloods(f"{table}_v0", "?", (DEFAULT_NAMESPACE,))
+                else:
+                    self.conn.execute(
+                        f"INSERT OR IGNORE INTO {table} (namespace, {columns}) "
+                        f"SELECT ?, {columns} FROM {table}_v0",
+                        (DEFAULT_NAMESPACE,),
+                    )
+                self.conn.execute(f"DROP TABLE {table}_v0")
+            if self._columns("announced_first_bloods"):
+                logger.info("Migrating announced first bloods to ranked bloods")
+                self.copy_first_bloods("announced_first_bloods", "namespace")
+                self.conn.execute("DROP TABLE announced_first_bloods")
+            # A category whose challenges already had a first blood is done
+            self.conn.execute(
+                """
+                INSERT OR IGNORE INTO announced_categories (namespace, category)
+                SELECT DISTINCT b.namespace, c.category
+                FROM announced_bloods b JOIN challenges c USING (namespace, challenge_id)
+                WHERE b.rank = 1 AND c.category IS NOT NULL
+                """
+            )
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
         logger.debug("Database table created/verified")
 
-    def is_announced(self, challenge_id):
+    def copy_first_bloods(self, table, namespace, params=()):
+        """Copy announced first bloods of an older schema as rank 1 bloods"""
+        self.conn.execute(
+            f"INSERT OR IGNORE INTO announced_bloods (namespace, challenge_id, rank) "
+            f"SELECT {namespace}, challenge_id, 1 FROM {table}",
+            params,
+        )
+
+    def load_announced(self):
         cur = self.conn.cursor()
         cur.execute(
-            "SELECT 1 FROM announced_first_bloods WHERE challenge_id=?", (challenge_id,)
+            "SELECT challenge_id, rank FROM announced_bloods WHERE namespace=?",
+            (self.namespace,),
         )
-        result = cur.fetchone() is not None
-        logger.debug(f"Challenge {challenge_id} announced status: {result}")
-        return result
+        return set(cur.fetchall())
 
-    def mark_announced(self, challenge_id):
+    def load_announced_categories(self):
+        cur = self.conn.cursor()
+        cur.execute(
+            "SELECT category FROM announced_categories WHERE namespace=?",
+            (self.namespace,),
+        )
+        return {row[0] for row in cur.fetchall()}
+
+    def is_announced(self, challenge_id, rank=1):
+        with self._lock:
+            return (challenge_id, rank) in self._announced
+
+    def mark_announced(self, challenge_id, rank=1):
+        self.mark_announced_many([(challenge_id, rank)])
+
+    def mark_announced_many(self, bloods):
+        """Mark (challenge id, rank) bloods as announced, persisting them in batches"""
+        with self._lock:
+            for blood in bloods:
+                if blood not in self._announced:
+                    self._announced.add(blood)
+                    self._pending.append(blood)
+        if len(self._pending) + len(self._pending_categories) >= self.batch_size:
+            self.flush()
+
+    def is_category_announced(self, category):
+        with self._lock:
+            return category in self._categories
+
+    def mark_categories_announced(self, categories):
+        """Mark categories whose first solve happened, persisting them in batches"""
+        with self._lock:
+            for category in categories:
+                if category is not None and category not in self._categories:
+                    self._categories.add(category)
+                    self._pending_categories.append(category)
+        if len(self._pending) + len(self._pending_categories) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write all pending announced marks in a single transaction"""
+        with self._lock:
+            if not self._pending and not self._pending_categories:
+                return
+            pending, self._pending = self._pending, []
+            categories, self._pending_categories = self._pending_categories, []
+        try:
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO announced_bloods (namespace, challenge_id, rank) VALUES (?, ?, ?)",
+                    [(self.namespace, challenge_id, rank) for challenge_id, rank in pending],
+                )
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO announced_categories (namespace, category) VALUES (?, ?)",
+                    [(self.namespace, category) for category in categories],
+                )
+        except sqlite3.Error:
+            # Kept for the next flush, e.g. once the database is unlocked
+            with self._lock:
+                self._pending = pending + self._pending
+                self._pending_categories = categories + self._pending_categories
+            raise
+        logger.debug(
+            f"Persisted {len(pending)} announced bloods and {len(categories)} categories"
+        )
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def load_routes(self):
+        cur = self.conn.cursor()
+        cur.execute(
+            "SELECT event_type, category, channel_id FROM announcement_routes WHERE namespace=?",
+            (self.namespace,),
+        )
+        return set(cur.fetchall())
+
+    def get_routes(self):
+        """Return all (event_type, category, channel_id) announcement routes"""
+        with self._lock:
+            routes = list(self._routes)
+        return sorted(routes)
+
+    def add_route(self, event_type, category, channel_id):
         with self.conn:
             self.conn.execute(
-                "INSERT OR IGNORE INTO announced_first_bloods (challenge_id) VALUES (?)",
-                (challenge_id,),
+                "INSERT OR IGNORE INTO announcement_routes (namespace, event_type, category, channel_id) VALUES (?, ?, ?, ?)",
+                (self.namespace, event_type, category, channel_id),
             )
-        logger.debug(f"Marked challenge {challenge_id} as announced")
+        with self._lock:
+            self._routes.add((event_type, category, channel_id))
+        logger.info(f"Added route {event_type}/{category} -> {channel_id}")
+
+    def remove_route(self, event_type, category, channel_id):
+        with self.conn:
+            cur = self.conn.execute(
+                "DELETE FROM announcement_routes WHERE namespace=? AND event_type=? AND category=? AND channel_id=?",
+                (self.namespace, event_type, category, channel_id),
+            )
+        with self._lock:
+            self._routes.discard((event_type, category, channel_id))
+        logger.info(f"Removed route {event_type}/{category} -> {channel_id}")
+        return cur.rowcount > 0
+
+    def get_cursor(self, name):
+        """Return a stored cursor (any JSON value), or None if never saved"""
+        cur = self.conn.cursor()
+        cur.execute(
+            "SELECT value FROM cursors WHERE namespace=? AND name=?",
+            (self.namespace, name),
+        )
+        row = cur.fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_cursor(self, name, value):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO cursors (namespace, name, value) VALUES (?, ?, ?)",
+                (self.namespace, name, json.dumps(value)),
+            )
+        logger.debug(f"Saved cursor {name}: {value}")
+
+    def load_mirror(self, table, key, columns):
+        cur = self.conn.execute(
+            f"SELECT {key}, {columns} FROM {table} WHERE namespace=?",
+            (self.namespace,),
+        )
+        return {row[0]: tuple(row[1:]) for row in cur.fetchall()}
+
+    def sync_challenges(self, challenges):
+        """
+        Mirror the CTFd challenge listing, writing only changed rows.
+
+        Challenges missing from the listing are marked hidden, never
+        deleted: a challenge hidden for a moment keeps its solve history. An
+        empty listing is ignored, as it is far more likely a failed read
+        than a CTF without challenges. A listing without solve counts (older
+        CTFd) keeps the count derived from mirrored solves.
+
+        Args:
+            challenges (list): Challenges as returned by CTFdAPI.get_challenges
+        """
+        if not challenges:
+            logger.debug("Not mirroring an empty challenge listing")
+            return
+        rows = {}
+        for chal in challenges:
+            row = (
+                chal.get("name"),
+                chal.get("category"),
+                chal.get("value"),
+                chal.get("solves"),
+                0,
+            )
+            if self._challenges.get(chal["id"]) != row:
+                rows[chal["id"]] = row
+        listed = {chal["id"] for chal in challenges}
+        hidden = {
+            chal_id: row[:4] + (1,)
+            for chal_id, row in self._challenges.items()
+            if chal_id not in listed and not row[4]
+        }
+        rows.update(hidden)
+        if not rows:
+            return
+        with self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO challenges (namespace, challenge_id, name, category, value, listed_solves, hidden, solve_count)
+                VALUES (?, ?, ?, ?, ?, ?, ?, COALESCE(?, 0))
+                ON CONFLICT (namespace, challenge_id) DO UPDATE SET
+                    name=excluded.name,
+                    category=excluded.category,
+                    value=excluded.value,
+                    listed_solves=excluded.listed_solves,
+                    hidden=excluded.hidden,
+                    solve_count=COALESCE(excluded.listed_solves, solve_count)
+                """,
+                [(self.namespace, chal_id, *row, row[3]) for chal_id, row in rows.items()],
+            )
+        self._challenges.update(rows)
+        logger.debug(
+            f"Mirrored {len(rows) - len(hidden)} changed and {len(hidden)} hidden challenges"
+        )
+
+    def sync_teams(self, scoreboard):
+        """
+        Mirror the scoreboard accounts, writing only changed rows.
+
+        Args:
+            scoreboard (list): Entries as returned by CTFdAPI.get_top_teams
+        """
+        entries = {
+            entry["account_id"]: (entry.get("name"), entry.get("score"))
+            for entry in scoreboard
+            if entry.get("account_id") is not None
+        }
+        rows = {
+            account_id: row
+            for account_id, row in entries.items()
+            if self._teams.get(account_id) != row
+        }
+        removed = set(self._teams) - set(entries)
+        if not rows and not removed:
+            return
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO teams (namespace, account_id, name, score) VALUES (?, ?, ?, ?)",
+                [(self.namespace, account_id, *row) for account_id, row in rows.items()],
+            )
+            self.conn.executemany(
+                "DELETE FROM teams WHERE namespace=? AND account_id=?",
+                [(self.namespace, account_id) for account_id in removed],
+            )
+        self._teams.update(rows)
+        for account_id in removed:
+            del self._teams[account_id]
+        logger.debug(f"Mirrored {len(rows)} changed and {len(removed)} removed teams")
+
+    def record_solves(self, challenge_solves):
+        """
+        Add correct solves to the mirror; known solves are ignored.
+
+        Args:
+            challenge_solves (list): (challenge_id, solve) pairs, each solve
+                shaped like the entries of /api/v1/challenges/<id>/solves
+
+        Returns:
+            int: Number of new solves
+        """
+        rows = []
+        for challenge_id, solve in challenge_solves:
+            solved_at = parse_ctf_time(solve.get("date"))
+            if solve.get("account_id") is None or solved_at is None:
+                continue
+            rows.append(
+                (self.namespace, challenge_id, solve["account_id"], solve.get("name"), solved_at)
+            )
+        if not rows:
+            return 0
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO solves (namespace, challenge_id, account_id, account_name, solved_at) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            added = self.conn.total_changes - before
+            if added:
+                # Only counts from listings without a solves field are raised
+                self.conn.executemany(
+                    """
+                    UPDATE challenges SET solve_count = (
+                        SELECT COUNT(*) FROM solves WHERE namespace=? AND challenge_id=?
+                    )
+                    WHERE namespace=? AND challenge_id=? AND listed_solves IS NULL
+                    """,
+                    [
+                        (self.namespace, challenge_id, self.namespace, challenge_id)
+                        for challenge_id in {row[1] for row in rows}
+                    ],
+                )
+        if added:
+            logger.debug(f"Mirrored {added} new solves")
+        return added
+
+    def earliest_solves(self, challenge_ids, limit=3):
+        """
+        Return the first mirrored solves of some challenges, oldest first.
+
+        Args:
+            challenge_ids (list): Challenges to look up
+            limit (int): Solves per challenge
+
+        Returns:
+            dict: Challenge id -> solves shaped like CTFd solves entries
+        """
+        earliest = {}
+        for challenge_id in challenge_ids:
+            cur = self.conn.execute(
+                """
+                SELECT account_id, account_name, solved_at FROM solves
+                WHERE namespace=? AND challenge_id=? ORDER BY solved_at LIMIT ?
+                """,
+                (self.namespace, challenge_id, limit),
+            )
+            earliest[challenge_id] = [
+                {"account_id": account_id, "name": name, "date": solved_at}
+                for account_id, name, solved_at in cur.fetchall()
+            ]
+        return earliest
+
+    def first_blooded_categories(self):
+        """Return the categories of mirrored challenges with an announced first blood"""
+        with self._lock:
+            first_blooded = [chal_id for chal_id, rank in self._announced if rank == 1]
+        return {
+            self._challenges[chal_id][1]
+            for chal_id in first_blooded
+            if chal_id in self._challenges and self._challenges[chal_id][1] is not None
+        }
+
+    def category_breakdown(self):
+        """
+        Return solve totals per category, most solved first.
+
+        Returns:
+            list: (category, challenges, solved challenges, solves) tuples
+        """
+        cur = self.conn.execute(
+            """
+            SELECT category, COUNT(*), SUM(solve_count > 0), SUM(solve_count)
+            FROM challenges WHERE namespace=? AND NOT hidden
+            GROUP BY category ORDER BY SUM(solve_count) DESC, category
+            """,
+            (self.namespace,),
+        )
+        return cur.fetchall()
+
+    def first_blood_history(self, limit=10):
+        """
+        Return the first solve of each solved challenge, newest first.
+
+        Each challenge is one index lookup on its earliest solve, so this
+        does not scan all solves.
+
+        Returns:
+            list: (challenge name, category, account name, solved_at) tuples
+        """
+        cur = self.conn.execute(
+            """
+            SELECT c.name, c.category, s.account_name, s.solved_at
+            FROM challenges c JOIN solves s ON s.rowid = (
+                SELECT rowid FROM solves
+                WHERE namespace=c.namespace AND challenge_id=c.challenge_id
+                ORDER BY solved_at LIMIT 1
+            )
+            WHERE c.namespace=? AND NOT c.hidden
+            ORDER BY s.solved_at DESC LIMIT ?
+            """,
+            (self.namespace, limit),
+        )
+        return cur.fetchall()
+
+
+class AsyncStateDB:
+    """
+    Awaitable facade over StateDB for use from coroutines.
+
+    Every database operation is queued to one dedicated writer thread, which
+    also owns the SQLite connection, so commits and fsyncs never run on the
+    event loop. Announced checks and route lookups are answered from memory
+    without leaving the loop, under a lock the writer thread also takes.
+    All instances share the writer thread, with one connection per namespace.
+    """
+
+    _writer = None
+
+    def __init__(self, db_path=DB_PATH, batch_size=DB_BATCH_SIZE, namespace=DEFAULT_NAMESPACE):
+        self.namespace = namespace
+        if AsyncStateDB._writer is None:
+            AsyncStateDB._writer = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="statedb-writer"
+            )
+        # Opening happens once at startup, so waiting for it here is fine
+        self._db = self._writer.submit(
+            StateDB, db_path, batch_size, namespace
+        ).result()
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        with SQLITE_OPERATION_SECONDS.time(func.__name__):
+            return await loop.run_in_executor(self._writer, func, *args)
+
+    async def is_announced(self, challenge_id, rank=1):
+        return self._db.is_announced(challenge_id, rank)
+
+    async def mark_announced(self, challenge_id, rank=1):
+        await self._run(self._db.mark_announced, challenge_id, rank)
+
+    async def mark_announced_many(self, bloods):
+        await self._run(self._db.mark_announced_many, list(bloods))
+
+    async def is_category_announced(self, category):
+        return self._db.is_category_announced(category)
+
+    async def mark_categories_announced(self, categories):
+        await self._run(self._db.mark_categories_announced, list(categories))
+
+    async def flush(self):
+        await self._run(self._db.flush)
+
+    async def get_routes(self):
+        return self._db.get_routes()
+
+    async def add_route(self, event_type, category, channel_id):
+        await self._run(self._db.add_route, event_type, category, channel_id)
+
+    async def remove_route(self, event_type, category, channel_id):
+        return await self._run(self._db.remove_route, event_type, category, channel_id)
+
+    async def get_cursor(self, name):
+        return await self._run(self._db.get_cursor, name)
+
+    async def set_cursor(self, name, value):
+        await self._run(self._db.set_cursor, name, value)
+
+    async def sync_challenges(self, challenges):
+        await self._run(self._db.sync_challenges, list(challenges))
+
+    async def sync_teams(self, scoreboard):
+        await self._run(self._db.sync_teams, list(scoreboard))
+
+    async def record_solves(self, challenge_solves):
+        return await self._run(self._db.record_solves, list(challenge_solves))
+
+    async def earliest_solves(self, challenge_ids, limit=3):
+        return await self._run(self._db.earliest_solves, list(challenge_ids), limit)
+
+    async def first_blooded_categories(self):
+        return await self._run(self._db.first_blooded_categories)
+
+    async def category_breakdown(self):
+        return await self._run(self._db.category_breakdown)
+
+    async def first_blood_history(self, limit=10):
+        return await self._run(self._db.first_blood_history, limit)
+
+    async def close(self):
+        await self._run(self._db.close)
@@ -1,91 +1,643 @@
 import logging
+import time
 from discord.ext import tasks
-from .config import ANNOUNCE_CHANNEL_ID, POLL_INTERVAL
-from .ctfd_api import CTFdAPI
-from .state_db import StateDB
-from .utils import sanitize_team_name, sanitize_challenge_name
+from .config import (
+    POLL_INTERVAL,
+    POLL_INTERVAL_MIN,
+    POLL_INTERVAL_MAX,
+    POLL_BACKOFF,
+    FIRST_BLOOD_SOURCE,
+    BLOOD_RANKS,
+    CATEGORY_FIRST_BLOOD,
+    ANNOUNCE_QUEUE_SIZE,
+    WEBHOOK_ENABLED,
+    WEBHOOK_POLL_INTERVAL,
+    SNAPSHOT_INTERVAL,
+    RANK_CHANGE_TOP,
+    RANK_CHANGE_MIN_JUMP,
+    RANK_CHANGE_COOLDOWN,
+    RANK_CHANGE_MAX_EVENTS,
+)
+from .announcer import AnnouncementQueue, AnnouncementRouter
+from .metrics import POLL_SECONDS, SOLVE_TO_ANNOUNCEMENT_SECONDS
+from .profiling import profile
+from .ratelimit import POLL, BACKGROUND, request_priority
+from .scheduler import AdaptivePollInterval
+from .scoreboard_diff import ScoreboardDiff, LEAD, TOP
+from .solve_index import SolveIndex
+from .utils import (
+    sanitize_team_name,
+    sanitize_challenge_name,
+    config_to_dict,
+    parse_ctf_time,
+)
 
 logger = logging.getLogger(__name__)
 
 
+SUBMISSIONS_CURSOR = "first_blood_submissions"
+# Unix time from which second/third bloods and category firsts are announced
+TRACKED_SINCE_CURSOR = "bloods_tracked_since"
+# Challenges whose full solve list is mirrored, or true once the mirror was
+# fed from the first submission on
+MIRROR_BACKFILL_CURSOR = "solves_mirror_backfilled"
+
+BLOOD_ORDINALS = {1: "First", 2: "Second", 3: "Third"}
+BLOOD_EMOJIS = {1: ":drop_of_blood:", 2: ":second_place:", 3: ":third_place:"}
+
+
+def submission_account_name(submission):
+    """Name of the team (or user in user mode) that made a submission"""
+    team = submission.get("team") or {}
+    user = submission.get("user") or {}
+    return team.get("name") or user.get("name")
+
+
+def correct_solves_by_challenge(submissions, hidden_accounts=()):
+    """
+    Group correct submissions by challenge in one pass.
+
+    Submissions of hidden or banned accounts are dropped, as CTFd does for
+    challenge solve lists, so both first blood sources agree.
+
+    Args:
+        submissions (list): Correct submissions from /api/v1/submissions
+        hidden_accounts (set): Ids of hidden or banned teams (users in user
+            mode)
+
+    Returns:
+        dict: Challenge id -> (challenge, solves oldest first), the solves
+            shaped like /api/v1/challenges/<id>/solves entries
+    """
+    grouped = {}
+    # Submission ids are autoincrementing, so id order is solve order
+    for sub in sorted(submissions, key=lambda sub: sub["id"]):
+        chal_id = sub.get("challenge_id")
+        account_id = sub.get("team_id") or sub.get("user_id")
+        if chal_id is None or account_id in hidden_accounts:
+            continue
+        if chal_id not in grouped:
+            chal = sub.get("challenge") or {}
+            chal = {
+                "id": chal_id,
+                "name": chal.get("name"),
+                "category": chal.get("category"),
+            }
+            grouped[chal_id] = (chal, [])
+        grouped[chal_id][1].append(
+            {
+                "account_id": account_id,
+                "name": submission_account_name(sub),
+                "date": sub.get("date"),
+            }
+        )
+    return grouped
+
+
+def prioritize_by_solve_delta(challenges, previous_counts):
+    """
+    Order challenges by how many solves they gained since the previous poll.
+
+    Args:
+        challenges (iterable): Challenges with their listing solve counts
+        previous_counts (dict): Challenge id -> solve count of the previous poll
+
+    Returns:
+        list: The challenges, biggest gain first, listing order among equals
+    """
+    return sorted(
+        challenges,
+        key=lambda chal: (chal.get("solves") or 0)
+        - (previous_counts.get(chal["id"]) or 0),
+        reverse=True,
+    )
+
+
+def format_blood(chal, solve, rank):
+    """Announcement text for the rank-th solve of a challenge"""
+    ordinal = BLOOD_ORDINALS.get(rank, f"{rank}th")
+    emoji = BLOOD_EMOJIS.get(rank, ":drop_of_blood:")
+    team_name = sanitize_team_name(solve["name"])
+    challenge_name = sanitize_challenge_name(chal["name"])
+    return f"{emoji} {ordinal} blood on **{challenge_name}** by {team_name}!"
+
+
+def format_category_first(category, chal, solve):
+    """Announcement text for the first solve in a category"""
+    return (
+        f":triangular_flag_on_post: First solve in **{sanitize_challenge_name(category)}**: "
+        f"**{sanitize_challenge_name(chal['name'])}** by {sanitize_team_name(solve['name'])}!"
+    )
+
+
+def format_rank_change(change, top):
+    """Announcement text for a RankChange"""
+    name = sanitize_team_name(change.name)
+    if change.kind == LEAD:
+        if change.displaced:
+            return f":crown: **{name}** took #1 from {sanitize_team_name(change.displaced)}!"
+        return f":crown: **{name}** took #1!"
+    if change.kind == TOP:
+        return f":chart_with_upwards_trend: **{name}** entered the top {top} at #{change.rank}!"
+    return f":arrow_up: **{name}** climbed from #{change.previous_rank} to #{change.rank}!"
+
+
 def register_tasks(bot):
-    ctfd = CTFdAPI()
-    db = StateDB()
+    for instance in bot.instances:
+        register_instance_tasks(bot, instance)
 
-    @tasks.loop(seconds=POLL_INTERVAL)
-    async def poll_first_bloods():
-        try:
-            channel = bot.get_channel(ANNOUNCE_CHANNEL_ID)
-            if not channel:
-                logger.warning(
-                    f"Channel {ANNOUNCE_CHANNEL_ID} not found - checking permissions and accessibility"
+
+def register_instance_tasks(bot, instance):
+    """Set up first blood detection and delivery for one CTFd instance"""
+    ctfd = instance.ctfd
+    db = instance.db
+    if WEBHOOK_ENABLED:
+        # Pushed solve events announce first bloods; polling only reconciles
+        schedule = AdaptivePollInterval(
+            WEBHOOK_POLL_INTERVAL,
+            max(WEBHOOK_POLL_INTERVAL, POLL_INTERVAL_MAX),
+            backoff=POLL_BACKOFF,
+        )
+    else:
+        schedule = AdaptivePollInterval(
+            POLL_INTERVAL_MIN,
+            POLL_INTERVAL_MAX,
+            initial=POLL_INTERVAL,
+            backoff=POLL_BACKOFF,
+        )
+    # Total and per-challenge solve counts of the previous poll, to notice
+    # new solves, the submissions cursor in use (None reloads the last
+    # persisted one) and how often it was rewound, when later bloods started
+    # being tracked, and which challenges have their whole solve list in the
+    # mirror
+    poll_state = {
+        "solve_total": None,
+        "solve_counts": {},
+        "cursor": None,
+        "rewinds": 0,
+        "tracked_since": None,
+        "backfilled": None,
+        "challenges_synced": False,
+    }
+    # Announcement key -> Unix time of the solve, for latency metrics. Solves
+    # from before startup are backlog, not latency, and are left out.
+    solved_at = {}
+    started_at = time.time()
+
+    # Category of each queued first blood, marked done once it is delivered
+    first_blood_categories = {}
+
+    async def mark_delivered(announcements):
+        now = time.time()
+        for a in announcements:
+            solve_time = solved_at.pop(a.key, None)
+            if solve_time is not None:
+                SOLVE_TO_ANNOUNCEMENT_SECONDS.observe(
+                    max(now - solve_time, 0.0), instance.name
                 )
-                # Try to get channel from all guilds
-                for guild in bot.guilds:
-                    channel = guild.get_channel(ANNOUNCE_CHANNEL_ID)
-                    if channel:
-                        logger.info(
-                            f"Found channel {ANNOUNCE_CHANNEL_ID} in guild {guild.name}, but bot.get_channel() failed"
-                        )
-                        break
-                else:
-                    logger.error(
-                        f"Channel {ANNOUNCE_CHANNEL_ID} not found in any guild. Bot is in {len(bot.guilds)} guilds."
-                    )
-                return
+        # Rank changes are fire and forget; bloods and categories persist
+        bloods = [a.key[1:] for a in announcements if a.key[0] == "blood"]
+        categories = [
+            a.key[1] for a in announcements if a.key[0] == "category_first_blood"
+        ]
+        categories.extend(
+            first_blood_categories.pop(chal_id, None)
+            for chal_id, rank in bloods
+            if rank == 1
+        )
+        await db.mark_announced_many(bloods)
+        await db.mark_categories_announced(categories)
+        await db.flush()
 
-            logger.debug(
-                f"Successfully accessed channel #{channel.name} ({channel.id})"
+    async def rewind_cursor(announcements):
+        # Re-read submissions from the last cursor persisted while nothing
+        # was in flight, so undelivered bloods are detected again. A poll
+        # already running must not store the cursor it read past them.
+        poll_state["cursor"] = None
+        poll_state["rewinds"] += 1
+        for a in announcements:
+            solved_at.pop(a.key, None)
+            if a.key[0] == "blood" and a.key[2] == 1:
+                first_blood_categories.pop(a.key[1], None)
+
+    router = AnnouncementRouter(bot, db, instance.channel_id)
+    # A deleted or inaccessible channel is resolved again next time instead
+    # of being sent to from the cache forever
+    queue = AnnouncementQueue(
+        mark_delivered,
+        on_failed=rewind_cursor,
+        on_unreachable=router.forget,
+        max_size=ANNOUNCE_QUEUE_SIZE,
+    )
+    instance.queue = queue
+    instance.router = router
+
+    async def tracked_since():
+        """Unix time second bloods and category firsts are tracked since
+
+        It is saved the first time, so solves from before the feature was
+        enabled are not announced as news, and downtime is caught up on.
+        """
+        if poll_state["tracked_since"] is None:
+            since = await db.get_cursor(TRACKED_SINCE_CURSOR)
+            if since is None:
+                since = time.time()
+                await db.set_cursor(TRACKED_SINCE_CURSOR, since)
+            poll_state["tracked_since"] = since
+        return poll_state["tracked_since"]
+
+    async def next_rank(chal_id):
+        """Lowest solve rank of a challenge still to announce, or None"""
+        for rank in range(1, BLOOD_RANKS + 1):
+            if not await db.is_announced(chal_id, rank):
+                return rank
+        return None
+
+    async def announce_blood(chal, solve, rank):
+        """Queue the announcement of a challenge's rank-th solve
+
+        First bloods go to the channels routed for first_blood, second and
+        third bloods to nth_blood routes, in the challenge's category. A
+        blood is marked announced once Discord accepted the message. Later
+        bloods that happened before tracking started are only marked.
+
+        Returns:
+            bool: Whether an announcement was queued, or None if the queue
+            refused it (no channel, or every channel queue full)
+        """
+        key = ("blood", chal["id"], rank)
+        if await db.is_announced(chal["id"], rank) or queue.is_pending(key):
+            return False
+        solve_time = parse_ctf_time(solve.get("date"))
+        if rank > 1 and (solve_time is None or solve_time < await tracked_since()):
+            await db.mark_announced(chal["id"], rank)
+            return False
+        event_type = "first_blood" if rank == 1 else "nth_blood"
+        channels = await router.destinations(event_type, chal.get("category"))
+        if queue.enqueue(channels, key, format_blood(chal, solve, rank)):
+            if rank == 1:
+                first_blood_categories[chal["id"]] = chal.get("category")
+                if solve_time is not None and solve_time >= started_at:
+                    solved_at[key] = solve_time
+            logger.info(
+                f"Queued blood #{rank} for challenge '{chal['name']}' by team '{solve['name']}' [{instance.name}]"
             )
+            return True
+        return None
 
-            challenges = ctfd.get_challenges()
-            logger.debug(f"Checking {len(challenges)} challenges for first bloods")
+    async def announce_category_first(category, chal, solve, solve_time):
+        """Queue the announcement of the first solve in a category; returns
+        whether it was queued, or None if the queue refused it"""
+        key = ("category_first_blood", category)
+        if await db.is_category_announced(category) or queue.is_pending(key):
+            return False
+        if solve_time is None or solve_time < await tracked_since():
+            await db.mark_categories_announced([category])
+            return False
+        channels = await router.destinations("category_first_blood", category)
+        if queue.enqueue(channels, key, format_category_first(category, chal, solve)):
+            logger.info(
+                f"Queued first solve in category '{category}' by team '{solve['name']}' [{instance.name}]"
+            )
+            return True
+        return None
 
-            # Filter out challenges that already have announced first bloods
-            unannnounced_challenges = []
-            for chal in challenges:
-                if not db.is_announced(chal["id"]):
-                    unannnounced_challenges.append(chal)
-                else:
-                    logger.debug(
-                        f"Skipping challenge '{chal['name']}' - first blood already announced"
-                    )
+    async def announce_index(index):
+        """Queue every blood and category first the poll's SolveIndex holds
 
-            logger.debug(
-                f"Found {len(unannnounced_challenges)} challenges without announced first bloods"
+        Returns:
+            tuple: Announcements newly queued, and announcements the queue
+            refused, which must be detected again
+        """
+        results = [
+            await announce_blood(chal, solve, rank)
+            for chal, solve, rank in index.bloods()
+        ]
+        if CATEGORY_FIRST_BLOOD:
+            results.extend(
+                [
+                    await announce_category_first(category, chal, solve, solve_time)
+                    for category, (chal, solve, solve_time) in index.category_firsts.items()
+                ]
             )
+        return results.count(True), results.count(None)
+
+    async def mark_done_categories(categories):
+        """Mark categories with an announced first blood as past their first solve"""
+        done = {
+            category
+            for category in categories
+            if category is not None and not await db.is_category_announced(category)
+        }
+        if done:
+            await db.mark_categories_announced(done)
+
+    async def backfill_mirror(chal_ids, stored_cursor):
+        """Mirror the whole solve list of challenges the mirror may only know in part
+
+        The mirror holds the submissions read after the stored cursor. A
+        deployment that had a cursor before the mirror existed lacks the
+        earlier solves, so the first new solve of a long solved challenge
+        would rank as its second blood. Each such challenge is read once
+        from /challenges/{id}/solves.
 
-            for chal in unannnounced_challenges:
-                # Check if challenge has any solves first (optimization)
-                solve_count = chal.get("solves", 0)
-                if solve_count == 0:
-                    logger.debug(
-                        f"Skipping challenge '{chal['name']}' ({chal['id']}) - no solves yet"
-                    )
-                    continue
+        Returns:
+            set: Challenges that could not be read, whose ranks are unknown
+        """
+        backfilled = poll_state["backfilled"]
+        if backfilled is None:
+            backfilled = await db.get_cursor(MIRROR_BACKFILL_CURSOR)
+            if backfilled is None:
+                # A mirror fed from the first submission on is complete
+                backfilled = not (stored_cursor or {}).get("last_id") or []
+                await db.set_cursor(MIRROR_BACKFILL_CURSOR, backfilled)
+            if backfilled is not True:
+                backfilled = set(backfilled)
+            poll_state["backfilled"] = backfilled
+        if backfilled is True:
+            return set()
+
+        missing = [chal_id for chal_id in chal_ids if chal_id not in backfilled]
+        if not missing:
+            return set()
+        logger.info(
+            f"Backfilling the solve mirror for {len(missing)} challenges [{instance.name}]"
+        )
+        failed = set()
+        fetched = []
+        async for chal_id, solves in ctfd.iter_solves(missing):
+            if isinstance(solves, Exception):
+                logger.warning(f"Could not backfill challenge {chal_id}: {solves}")
+                failed.add(chal_id)
+                continue
+            fetched.extend((chal_id, solve) for solve in solves)
+        await db.record_solves(fetched)
+        backfilled.update(chal_id for chal_id in missing if chal_id not in failed)
+        await db.set_cursor(MIRROR_BACKFILL_CURSOR, sorted(backfilled))
+        return failed
+
+    async def mirror_solves(challenge_solves):
+        """Add fetched solves to the local mirror without failing the caller"""
+        try:
+            await db.record_solves(challenge_solves)
+        except Exception as e:
+            logger.error(f"Error mirroring solves [{instance.name}]: {e}")
+
+    async def handle_solve_event(challenge_id):
+        """Announce the bloods of a challenge after a pushed solve event
+
+        The event only says which challenge was solved; the solves are read
+        back from CTFd so the announcement names the actual solvers.
+        """
+        try:
+            if await next_rank(challenge_id) is None:
+                return
+            with request_priority(POLL):
+                chal = await ctfd.get_challenge(challenge_id)
+                solves = await ctfd.get_solves(challenge_id)
+            await mirror_solves((challenge_id, solve) for solve in solves)
+            index = SolveIndex(BLOOD_RANKS)
+            index.add(chal, solves)
+            await announce_index(index)
+        except Exception as e:
+            logger.error(
+                f"Error handling solve event for challenge {challenge_id} [{instance.name}]: {e}"
+            )
+
+    async def find_bloods_from_solves():
+        """Index solves with one request per challenge that has a blood to announce
+
+        A challenge is only fetched when its solve count reached the next
+        rank still to announce. Returns the SolveIndex, whether the listing's
+        solve counts changed since the previous poll, and no cursor.
+        """
+        challenges = await ctfd.get_challenges()
+        try:
+            await db.sync_challenges(challenges)
+        except Exception as e:
+            logger.error(f"Error mirroring challenges [{instance.name}]: {e}")
+        # Per-challenge messages are only built when DEBUG is enabled
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug(f"Checking {len(challenges)} challenges for bloods")
+
+        solve_total = sum(chal.get("solves") or 0 for chal in challenges)
+        previous_total = poll_state["solve_total"]
+        poll_state["solve_total"] = solve_total
+        activity = previous_total is not None and solve_total != previous_total
+
+        # A category with an announced first blood had its first solve
+        await mark_done_categories(
+            [chal.get("category") for chal in challenges if await db.is_announced(chal["id"])]
+        )
+
+        candidates = {}
+        for chal in challenges:
+            rank = await next_rank(chal["id"])
+            if rank is None:
+                continue
+            # Check if challenge has enough solves first (optimization)
+            solve_count = chal.get("solves")
+            if solve_count is not None and solve_count < rank:
+                continue
+            if debug:
                 logger.debug(
-                    f"Checking solves for challenge '{chal['name']}' ({chal['id']}) - {solve_count} solves"
+                    f"Checking solves for challenge '{chal['name']}' ({chal['id']}) - {solve_count} solves, next rank {rank}"
+                )
+            candidates[chal["id"]] = chal
+
+        # Challenges that just gained solves most likely have a new blood,
+        # so their requests go out first
+        previous_counts = poll_state["solve_counts"]
+        poll_state["solve_counts"] = {
+            chal["id"]: chal.get("solves") for chal in challenges
+        }
+        order = prioritize_by_solve_delta(candidates.values(), previous_counts)
+
+        index = SolveIndex(BLOOD_RANKS)
+        fetched_solves = []
+        async for chal_id, solves in ctfd.iter_solves([chal["id"] for chal in order]):
+            if isinstance(solves, Exception):
+                # Retried next poll; the other challenges are still checked
+                logger.warning(f"Skipping challenge {chal_id} this poll: {solves}")
+                continue
+            fetched_solves.extend((chal_id, solve) for solve in solves)
+            index.add(candidates[chal_id], solves)
+        await mirror_solves(fetched_solves)
+        return index, activity, None
+
+    async def find_bloods_from_submissions():
+        """Index the solves of challenges with correct submissions newer than the cursor
+
+        The new submissions go to the local mirror first, which then gives
+        the earliest solvers of each challenge they touch. Returns the
+        SolveIndex, whether any new solves appeared, and the advanced
+        cursor. The caller persists the cursor only while no announcement
+        is in flight, so a restart never skips an undelivered one. If a
+        challenge's solves could not be backfilled, the cursor is not
+        advanced and the submissions are read again next poll.
+        """
+        stored_cursor = poll_state["cursor"] or await db.get_cursor(SUBMISSIONS_CURSOR)
+        submissions, cursor = await ctfd.get_submissions_since(stored_cursor, "correct")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                f"Checking {len(submissions)} new correct submissions for bloods"
+            )
+
+        hidden_accounts = set()
+        if submissions:
+            # In team mode the team is the account, as in CTFd's solve lists
+            team_mode = any(sub.get("team_id") for sub in submissions)
+            hidden_accounts = await ctfd.get_hidden_account_ids(
+                "teams" if team_mode else "users",
+                {sub.get("team_id") or sub.get("user_id") for sub in submissions},
+            )
+        grouped = correct_solves_by_challenge(submissions, hidden_accounts)
+        await mirror_solves(
+            (chal_id, solve)
+            for chal_id, (_, solves) in grouped.items()
+            for solve in solves
+        )
+        index = SolveIndex(BLOOD_RANKS)
+        if not grouped:
+            return index, bool(submissions), cursor
+
+        # Categories are only known for mirrored challenges; the snapshot
+        # refresh keeps them in sync, but may not have run yet
+        if CATEGORY_FIRST_BLOOD and not poll_state["challenges_synced"]:
+            await db.sync_challenges(await ctfd.get_challenges())
+            poll_state["challenges_synced"] = True
+        # A category with an announced first blood had its first solve
+        first_blooded = await db.first_blooded_categories()
+        first_blooded.update(
+            [
+                chal.get("category")
+                for chal_id, (chal, _) in grouped.items()
+                if await db.is_announced(chal_id)
+            ]
+        )
+        await mark_done_categories(first_blooded)
+
+        unranked = await backfill_mirror(
+            [
+                chal_id
+                for chal_id, (chal, _) in grouped.items()
+                if await next_rank(chal_id) is not None
+                or (
+                    CATEGORY_FIRST_BLOOD
+                    and not await db.is_category_announced(chal.get("category"))
                 )
-                solves = ctfd.get_solves(chal["id"])
-                if solves:
-                    first = solves[0]
-                    logger.info(
-                        f"Found first solve for challenge {chal['id']}: {first}"
-                    )
+            ],
+            stored_cursor,
+        )
+        try:
+            earliest = await db.earliest_solves(grouped, BLOOD_RANKS)
+        except Exception as e:
+            # Without the mirror, ranks past the first are unknown
+            logger.error(f"Error reading solve order from the mirror [{instance.name}]: {e}")
+            earliest = {chal_id: solves[:1] for chal_id, (_, solves) in grouped.items()}
+        for chal_id, (chal, solves) in grouped.items():
+            if chal_id not in unranked:
+                index.add(chal, earliest.get(chal_id) or solves[:1])
+        return index, bool(submissions), None if unranked else cursor
 
-                    # Handle different possible structures for team name and user name
-                    team_name = sanitize_team_name(first["name"])
-                    challenge_name = sanitize_challenge_name(chal["name"])
+    @tasks.loop(seconds=POLL_INTERVAL)
+    async def poll_first_bloods():
+        with profile(f"poll-{instance.name}"), request_priority(POLL):
+            await poll_cycle()
 
-                    announcement = f":drop_of_blood: First blood on **{challenge_name}** by {team_name}!"
+    async def poll_cycle():
+        activity = False
+        start = time.perf_counter()
+        try:
+            # Start tracking before any solve is judged against it, so the
+            # first later blood after an upgrade is not taken for history
+            await tracked_since()
+            if FIRST_BLOOD_SOURCE == "submissions":
+                find_bloods = find_bloods_from_submissions
+            else:
+                find_bloods = find_bloods_from_solves
+            rewinds = poll_state["rewinds"]
+            index, activity, cursor = await find_bloods()
+            # A challenge whose visible solves lag its count (hidden or
+            # banned solvers) stays in the index every poll, so only new
+            # announcements count as activity besides changed solve counts
+            queued, rejected = await announce_index(index)
+            if queued:
+                activity = True
+            if rejected:
+                # Read the refused bloods again rather than skip past them
+                logger.warning(
+                    f"{rejected} announcements could not be queued, keeping the cursor [{instance.name}]"
+                )
+                cursor = None
+            elif poll_state["rewinds"] != rewinds:
+                # A failed delivery rewound the cursor while this poll ran
+                cursor = None
 
-                    await channel.send(announcement)
-                    db.mark_announced(chal["id"])
-                    logger.info(
-                        f"Announced first blood for challenge '{chal['name']}' by team '{first['name']}'"
-                    )
+            if cursor is not None:
+                poll_state["cursor"] = cursor
+                if not queue.has_pending():
+                    await db.set_cursor(SUBMISSIONS_CURSOR, cursor)
 
         except Exception as e:
-            logger.error(f"Error in poll_first_bloods task: {e}")
+            logger.error(f"Error in poll_first_bloods task [{instance.name}]: {e}")
+        finally:
+            # An error escaping the loop body would stop polling for good
+            try:
+                await db.flush()
+            except Exception as e:
+                logger.error(f"Error flushing state after poll [{instance.name}]: {e}")
+            POLL_SECONDS.observe(time.perf_counter() - start, instance.name)
+            try:
+                await reschedule(activity)
+            except Exception as e:
+                logger.error(f"Error rescheduling poll [{instance.name}]: {e}")
+
+    async def reschedule(activity):
+        """Adapt the poll interval to recent activity and the CTF window"""
+        schedule.record_poll(activity)
+        config = config_to_dict(await ctfd.get_ctf_config())
+        interval = schedule.next_interval(
+            start=parse_ctf_time(config.get("start")),
+            end=parse_ctf_time(config.get("end")),
+        )
+        if interval != poll_first_bloods.seconds:
+            logger.debug(f"Next first blood poll in {interval:.0f}s")
+            poll_first_bloods.change_interval(seconds=interval)
+
+    scoreboard_diff = ScoreboardDiff(
+        RANK_CHANGE_TOP,
+        RANK_CHANGE_MIN_JUMP,
+        RANK_CHANGE_COOLDOWN,
+        RANK_CHANGE_MAX_EVENTS,
+    )
+    rank_state = {"snapshot": None}  # last snapshot compared
+
+    async def announce_rank_changes(snapshot):
+        """Queue announcements for rank changes since the previous snapshot"""
+        if snapshot is None or snapshot is rank_state["snapshot"]:
+            return
+        rank_state["snapshot"] = snapshot
+        changes = scoreboard_diff.update(snapshot.standings())
+        if not changes:
+            return
+        channels = await router.destinations("rank_change")
+        for change in changes:
+            key = ("rank_change",) + change.key
+            if queue.enqueue(channels, key, format_rank_change(change, RANK_CHANGE_TOP)):
+                logger.info(
+                    f"Queued rank change: {change.name} {change.kind} #{change.rank} [{instance.name}]"
+                )
+
+    @tasks.loop(seconds=SNAPSHOT_INTERVAL)
+    async def refresh_snapshots():
+        # Commands render from the snapshot, so their rate never reaches CTFd
+        with request_priority(BACKGROUND):
+            snapshot = await instance.refresh_snapshot()
+        if RANK_CHANGE_TOP:
+            await announce_rank_changes(snapshot)
 
-    bot.poll_first_bloods = poll_first_bloods
+    instance.poll_first_bloods = poll_first_bloods
+    instance.refresh_snapshots = refresh_snapshots
+    instance.handle_solve_event = handle_solve_event
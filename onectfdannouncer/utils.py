@@ -3,6 +3,7 @@ Utility functions for Discord bot operations.
 """
 
 import re
+from datetime import datetime, timezone
 
 
 def escape_markdown(text):
@@ -84,3 +85,71 @@ def sanitize_challenge_name(challenge_name):
         sanitized = sanitized[: max_length - 3] + "..."
 
     return sanitized
+
+
+def config_to_dict(config):
+    """
+    Convert a CTFd configs payload to a plain key/value dict.
+
+    Args:
+        config (list | dict): The /configs payload, either a list of
+            {"key", "value"} items (admin listing) or an already flat dict
+
+    Returns:
+        dict: The config values keyed by name
+    """
+    if isinstance(config, dict):
+        return config
+
+    config_dict = {}
+    if isinstance(config, list):
+        for item in config:
+            if isinstance(item, dict) and "key" in item and "value" in item:
+                config_dict[item["key"]] = item["value"]
+    return config_dict
+
+
+def parse_ctf_time(value):
+    """
+    Parse a CTFd start/end config value into a Unix timestamp.
+
+    Args:
+        value (str | int | float): Unix timestamp or ISO 8601 string
+
+    Returns:
+        float: The timestamp, or None if the value is empty or unparseable
+    """
+    if value in (None, ""):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(int(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def format_age(seconds):
+    """
+    Format a duration as a short human readable age.
+
+    Args:
+        seconds (float): Age in seconds
+
+    Returns:
+        str: The age, e.g. "just now", "42s ago" or "3m ago"
+    """
+    if seconds < 1:
+        return "just now"
+    if seconds < 60:
+        return f"{int(seconds)}s ago"
+    if seconds < 3600:
+        return f"{int(seconds // 60)}m ago"
+    return f"{int(seconds // 3600)}h ago"
@@ -0,0 +1,98 @@
+"""
+Event loop watchdog reporting what blocks the loop while it is blocked.
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from .metrics import EVENT_LOOP_LAG_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class LoopWatchdog:
+    """
+    Detects callbacks that hold the event loop for too long.
+
+    A heartbeat task wakes up every ``interval`` seconds and records how late
+    it ran into the event loop lag histogram. A daemon thread watches the
+    heartbeat; once it is ``threshold`` seconds overdue, the thread logs the
+    stack of the event loop thread, which shows the code that is blocking,
+    together with the running task. Each stall is reported once.
+
+    Args:
+        threshold (float): Seconds of blocking that trigger a report, 0
+            disables the watcher thread and keeps only the lag metric
+        interval (float): Heartbeat period in seconds
+    """
+
+    def __init__(self, threshold=1.0, interval=0.25):
+        self.threshold = threshold
+        self.interval = interval
+        self.stalls = 0
+        self._last_tick = time.monotonic()
+        self._loop = None
+        self._loop_thread_id = None
+        self._heartbeat_task = None
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        """Start watching the running event loop"""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        if self.threshold > 0:
+            self._thread = threading.Thread(
+                target=self._watch, name="loop-watchdog", daemon=True
+            )
+            self._thread.start()
+
+    async def _heartbeat(self):
+        while True:
+            start = self._loop.time()
+            self._last_tick = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = max(self._loop.time() - start - self.interval, 0.0)
+            EVENT_LOOP_LAG_SECONDS.observe(lag)
+            if self.threshold > 0 and lag >= self.threshold:
+                logger.warning(f"Event loop was blocked for {lag:.2f}s")
+
+    def _watch(self):
+        reported = None
+        while not self._stopped.wait(self.interval):
+            tick = self._last_tick
+            blocked = time.monotonic() - tick - self.interval
+            if blocked < self.threshold or tick == reported:
+                continue
+            reported = tick
+            self.stalls += 1
+            logger.warning(
+                f"Event loop blocked for {blocked:.2f}s so far{self._task_description()}; "
+                f"loop thread stack:\n{self._loop_stack()}"
+            )
+
+    def _loop_stack(self):
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return "  <unavailable>"
+        return "".join(traceback.format_stack(frame)).rstrip()
+
+    def _task_description(self):
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            return ""
+        if task is None:
+            return " outside any task"
+        return f" in task {task.get_name()} ({task.get_coro().__qualname__})"
+
+    async def stop(self):
+        self._stopped.set()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            await asyncio.gather(self._heartbeat_task, return_exceptions=True)
@@ -0,0 +1,64 @@
+"""
+Push endpoint for solve events from a CTFd plugin or event-stream consumer.
+"""
+
+import asyncio
+import hmac
+import logging
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+SOLVE_EVENT_PATH = "/events/solve"
+
+
+def register_webhook(server, secret, instances):
+    """
+    Register the solve event endpoint on an HTTPServer.
+
+    Clients POST JSON like {"challenge_id": 12} with the shared secret in an
+    ``Authorization: Bearer <secret>`` header, adding "instance" to target a
+    CTFd instance other than the default one. The request is acknowledged
+    with 202 right away and the event is handled in the background.
+
+    Args:
+        server (HTTPServer): Server to add the route to
+        secret (str): Shared secret clients must present
+        instances (InstanceRegistry): Instances whose solve events to accept
+    """
+    expected = f"Bearer {secret}".encode()
+    pending = set()
+
+    async def solve_event(request):
+        provided = request.headers.get("Authorization", "").encode()
+        if not hmac.compare_digest(provided, expected):
+            return web.json_response({"success": False}, status=401)
+
+        try:
+            payload = await request.json()
+            instance = instances.get(payload.get("instance"))
+            challenge_id = payload.get("challenge_id")
+            if challenge_id is None:
+                challenge_id = (payload.get("challenge") or {}).get("id")
+            challenge_id = int(challenge_id)
+        except (ValueError, TypeError, AttributeError):
+            return web.json_response(
+                {"success": False, "error": "challenge_id is required"}, status=400
+            )
+
+        if instance is None:
+            return web.json_response(
+                {"success": False, "error": "unknown instance"}, status=404
+            )
+
+        logger.debug(
+            f"Received solve event for challenge {challenge_id} [{instance.name}]"
+        )
+        task = asyncio.create_task(instance.handle_solve_event(challenge_id))
+        # Keep a reference so the task is not garbage collected mid-flight
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+        return web.json_response({"success": True}, status=202)
+
+    server.add_route("POST", SOLVE_EVENT_PATH, solve_event)
+    logger.info(f"Solve event webhook registered at {SOLVE_EVENT_PATH}")